@@ -6,6 +6,7 @@ import time
 import psutil
 import random
 from speech_recognition import SpeechRecognizer
+import latency
 from modules.nlp.text_to_speech import TextToSpeech
 from modules.system.system_monitor import SystemMonitor
 from modules.automation.weather import WeatherMonitor
@@ -74,6 +75,7 @@ class AVSAISGUI:
         
         self.root.after(5000, self.update_system_stats)  # Refresh every 5 seconds
         
+    @latency.timed("command.dispatch")
     def process_command(self, event=None):
         """Processes user commands from the text entry."""
         command = self.command_entry.get().strip().lower()
@@ -99,6 +101,8 @@ class AVSAISGUI:
             self.email_manager.check_inbox()
         elif "weather" in command:
             self.weather_label.config(text=f"Weather: {self.weather_monitor.get_weather()}")
+        elif "latency report" in command:
+            latency.dump()  # Per-stage timings; start with AVSAIS_LATENCY=1 to record them
         else:
             self.tts.speak("I'm not sure how to handle that command yet.")
         
@@ -109,10 +113,11 @@ class AVSAISGUI:
     def listen_for_commands(self):
         """Continuously listens for voice commands."""
         while True:
-            response = self.speech_recognizer.recognize_speech()
-            if response:
-                self.command_entry.insert(0, response)
-                self.process_command()
+            with latency.span("pipeline.voice_command"):
+                response = self.speech_recognizer.recognize_speech()
+                if response:
+                    self.command_entry.insert(0, response)
+                    self.process_command()
             time.sleep(1)  # Prevent excessive CPU usage
 
 if __name__ == "__main__":
@@ -2,8 +2,14 @@
 import json
 import os
 import random
-from nlp.reinforcement_learning import ReinforcementLearning
-from nlp.knowledge_base import KnowledgeBase
+import sys
+
+# The NLP modules import each other by flat name, so load them the same way; importing them
+# as nlp.* as well would create second copies with their own shared stores
+NLP_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "nlp"))
+if NLP_DIR not in sys.path:
+    sys.path.insert(0, NLP_DIR)
+import components
 
 LEARNING_MODEL_FILE = "learning_model.json"
 
@@ -11,8 +17,8 @@ class LearningModel:
     def __init__(self):
         """Initializes the learning model, reinforcement learning, and knowledge base."""
         self.learning_data = self.load_learning_data()
-        self.reinforcement = ReinforcementLearning()
-        self.knowledge_base = KnowledgeBase()
+        self.reinforcement = components.get_reinforcement()
+        self.knowledge_base = components.get_knowledge_base()
     
     def load_learning_data(self):
         """Loads the learning model data from a file."""
@@ -0,0 +1,72 @@
+# Lazy, process-wide registry of the heavy NLP components
+import threading
+
+_instances = {}
+_lock = threading.RLock()  # Re-entrant: building one component may fetch another
+
+def get_component(name, factory):
+    """
+    Returns the shared instance registered under name, calling factory() to build it on
+    first use. Every later call, from any thread, gets the same object.
+    """
+    instance = _instances.get(name)
+    if instance is None:
+        with _lock:
+            instance = _instances.get(name)
+            if instance is None:
+                instance = _instances[name] = factory()
+    return instance
+
+def register_component(name, instance):
+    """Installs a ready-made instance, e.g. a test double or a differently configured component."""
+    with _lock:
+        _instances[name] = instance
+
+def reset_components():
+    """Forgets every shared instance so the next lookup builds a fresh one."""
+    with _lock:
+        _instances.clear()
+
+def get_reinforcement(learning_file="learning_data.json"):
+    from reinforcement_learning import ReinforcementLearning
+    return ReinforcementLearning.shared(learning_file)
+
+def get_memory():
+    from memory import MemoryModule
+    return get_component("memory", MemoryModule)
+
+def get_sessions():
+    from sessions import SessionManager
+    return get_component("sessions", SessionManager)
+
+def get_intent_recognizer():
+    from intent_recognizer import IntentRecognizer
+    return get_component("intent_recognizer", IntentRecognizer)
+
+def get_response_generator():
+    from response_generator import ResponseGenerator
+    return get_component("response_generator", ResponseGenerator)
+
+def get_knowledge_base():
+    from knowledge_base import KnowledgeBase
+    return get_component("knowledge_base", KnowledgeBase)
+
+def get_web_scraper():
+    from web_scraper import WebScraper
+    return get_component("web_scraper", WebScraper)
+
+def get_sentiment_analyzer():
+    from sentiment_analysis import SentimentAnalyzer
+    return get_component("sentiment_analyzer", SentimentAnalyzer)
+
+if __name__ == "__main__":
+    import time
+    import components  # The registry other modules see; running this file loads it a second time as __main__
+
+    start = time.perf_counter()
+    responder = components.get_response_generator()
+    print(f"ResponseGenerator ready in {(time.perf_counter() - start) * 1000:.1f} ms (nothing loaded yet)")
+    start = time.perf_counter()
+    print(responder.generate_response("Hey there!", user_name="Alex"))
+    print(f"First response, loading intents and memory: {(time.perf_counter() - start) * 1000:.1f} ms")
+    print("Same recognizer shared:", responder.intent_recognizer is components.get_intent_recognizer())
\ No newline at end of file
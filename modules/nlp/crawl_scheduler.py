@@ -0,0 +1,256 @@
+# Per-host fetch queue with concurrency caps, rate limits, retries and priority lanes
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+import requests
+import latency
+
+INTERACTIVE = 0  # A user is waiting on the answer
+BACKGROUND = 1  # Enrichment and prefetching; runs when interactive work leaves room
+LANES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        """Allows burst requests at once, refilled at rate requests per second."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self, now):
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+class _Host:
+    def __init__(self, rate, burst):
+        self.active = 0
+        self.bucket = TokenBucket(rate, burst)
+
+class _Task:
+    def __init__(self, url, priority, kwargs):
+        self.url = url
+        self.host = urlsplit(url).netloc.lower()
+        self.priority = priority
+        self.kwargs = kwargs
+        self.future = Future()
+        self.submitted = time.monotonic()
+        self.not_before = 0.0
+        self.attempt = 0
+
+class CrawlScheduler:
+    def __init__(self, fetch, max_workers=8, per_host_concurrency=2, rate=2.0, burst=4,
+                 max_retries=2, backoff=0.5, max_backoff=30.0):
+        """
+        Runs fetch(url, **kwargs) on max_workers threads. Each host gets at most
+        per_host_concurrency requests in flight and rate requests per second (bursts of
+        burst). Network errors and 429/5xx responses are retried up to max_retries times with
+        exponential backoff (or Retry-After). Interactive requests always go before
+        background ones.
+        """
+        self.fetch = fetch
+        self.max_workers = max_workers
+        self.per_host_concurrency = per_host_concurrency
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.queue = []  # Heap of (priority, sequence, task)
+        self.sequence = itertools.count()
+        self.hosts = {}
+        self.condition = threading.Condition()
+        self.workers = []
+        self.closed = False
+        self.depth = {lane: 0 for lane in LANES}
+        self.max_depth = {lane: 0 for lane in LANES}
+        self.dispatched = {lane: 0 for lane in LANES}
+        self.total_wait = {lane: 0.0 for lane in LANES}
+        self.max_wait = {lane: 0.0 for lane in LANES}
+        self.retried = 0
+        self.failed = 0
+
+    def submit(self, url, priority=INTERACTIVE, **kwargs):
+        """Queues a fetch and returns a Future for its response (or its final exception)."""
+        task = _Task(url, priority, kwargs)
+        with self.condition:
+            if self.closed:
+                raise RuntimeError("CrawlScheduler is closed")
+            self._push(task)
+            self.depth[priority] += 1
+            self.max_depth[priority] = max(self.max_depth[priority], self.depth[priority])
+            if len(self.workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, daemon=True, name=f"crawl-{len(self.workers)}")
+                self.workers.append(worker)
+                worker.start()
+            self.condition.notify()
+        return task.future
+
+    def get(self, url, priority=INTERACTIVE, **kwargs):
+        """Blocking submit: returns the response or raises the last network error."""
+        return self.submit(url, priority, **kwargs).result()
+
+    def _push(self, task):
+        heapq.heappush(self.queue, (task.priority, next(self.sequence), task))
+
+    def _next_task(self):
+        """
+        Pops the highest priority task that may run now. Otherwise returns how long to wait
+        before one might (None if only a completion can unblock the queue).
+        """
+        now = time.monotonic()
+        wait, skipped, chosen = None, [], None
+        while self.queue:
+            item = heapq.heappop(self.queue)
+            task = item[2]
+            host = self.hosts.get(task.host)
+            if host is None:
+                host = self.hosts[task.host] = _Host(self.rate, self.burst)
+            if task.not_before > now:
+                delay = task.not_before - now
+            elif host.active >= self.per_host_concurrency:
+                skipped.append(item)
+                continue
+            else:
+                delay = host.bucket.delay(now)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                skipped.append(item)
+                continue
+            host.bucket.take()
+            host.active += 1
+            chosen = task
+            break
+        for item in skipped:
+            heapq.heappush(self.queue, item)
+        return chosen, wait
+
+    def _work(self):
+        while True:
+            with self.condition:
+                while True:
+                    if self.closed:
+                        return
+                    task, wait = self._next_task()
+                    if task is not None:
+                        break
+                    self.condition.wait(wait)
+                if task.attempt == 0:
+                    self._record_wait(task)
+
+            response, error = None, None
+            try:
+                response = self.fetch(task.url, **task.kwargs)
+            except Exception as e:  # Handed to the caller through the future; only network errors are retried
+                error = e
+            if error is None:
+                transient = response.status_code in RETRY_STATUSES
+            else:
+                transient = isinstance(error, requests.RequestException)
+
+            with self.condition:
+                self.hosts[task.host].active -= 1
+                retry = transient and task.attempt < self.max_retries
+                if retry:
+                    task.attempt += 1
+                    task.not_before = time.monotonic() + self._retry_delay(task.attempt, response)
+                    self._push(task)
+                    self.retried += 1
+                else:
+                    self.depth[task.priority] -= 1
+                    if transient or error is not None:
+                        self.failed += 1
+                self.condition.notify_all()
+            if not retry:
+                if error is not None:
+                    task.future.set_exception(error)
+                else:
+                    task.future.set_result(response)
+
+    def _retry_delay(self, attempt, response):
+        delay = self.backoff * 2 ** (attempt - 1) * random.uniform(0.8, 1.2)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        return min(delay, self.max_backoff)
+
+    def _record_wait(self, task):
+        waited = time.monotonic() - task.submitted
+        lane = task.priority
+        self.dispatched[lane] += 1
+        self.total_wait[lane] += waited
+        self.max_wait[lane] = max(self.max_wait[lane], waited)
+        if latency.ENABLED:
+            latency.record(f"crawl.wait.{LANES[lane]}", waited)
+
+    def stats(self):
+        """Queue depth (queued or retrying), wait times per lane, retries and per-host load."""
+        with self.condition:
+            return {
+                "lanes": {LANES[lane]: {
+                    "depth": self.depth[lane],
+                    "max_depth": self.max_depth[lane],
+                    "dispatched": self.dispatched[lane],
+                    "avg_wait_ms": round(self.total_wait[lane] * 1000 / self.dispatched[lane], 3) if self.dispatched[lane] else 0.0,
+                    "max_wait_ms": round(self.max_wait[lane] * 1000, 3)
+                } for lane in LANES},
+                "retried": self.retried,
+                "failed": self.failed,
+                "in_flight": {host: state.active for host, state in self.hosts.items() if state.active}
+            }
+
+    def close(self):
+        """Stops the workers once they finish their current fetch; queued tasks are cancelled."""
+        with self.condition:
+            self.closed = True
+            for _, _, task in self.queue:
+                task.future.cancel()
+            self.queue.clear()
+            self.condition.notify_all()
+
+if __name__ == "__main__":
+    # Local stand-in server: /flaky fails twice before succeeding
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    flaky_calls = itertools.count()
+
+    class StandIn(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(0.05)
+            status = 503 if self.path == "/flaky" and next(flaky_calls) < 2 else 200
+            self.send_response(status)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    session = requests.Session()
+    scheduler = CrawlScheduler(lambda url, **kwargs: session.get(url, timeout=5, **kwargs),
+                               per_host_concurrency=2, rate=20, burst=5, backoff=0.1)
+    start = time.monotonic()
+    background = [scheduler.submit(f"{base}/page/{i}", priority=BACKGROUND) for i in range(30)]
+    interactive = [scheduler.submit(f"{base}/answer/{i}") for i in range(3)] + [scheduler.submit(f"{base}/flaky")]
+    for future in interactive:
+        future.result()
+    print(f"Interactive requests done after {time.monotonic() - start:.2f}s, flaky one returned {interactive[-1].result().status_code}")
+    for future in background:
+        future.result()
+    print(f"Background requests done after {time.monotonic() - start:.2f}s (20 req/s for one host)")
+    print("Scheduler stats:", scheduler.stats())
+    scheduler.close()
+    server.shutdown()
\ No newline at end of file
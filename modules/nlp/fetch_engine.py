@@ -0,0 +1,97 @@
+# Pooled, time-bounded HTTP fetching with concurrent first-result-wins lookups
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from requests.adapters import HTTPAdapter
+from crawl_scheduler import CrawlScheduler, INTERACTIVE
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+DEFAULT_TIMEOUT = (3.05, 10)  # (connect, read) seconds per request
+
+class FetchEngine:
+    def __init__(self, timeout=DEFAULT_TIMEOUT, max_workers=5, pool_size=10, headers=None, cache=None,
+                 crawl_options=None):
+        """
+        Shares one requests.Session, so connections to a host are kept alive and reused, and
+        bounds every request by timeout so a slow host cannot stall a voice query. With an
+        HTTPCache, fresh pages are served from disk and stale ones revalidated. With
+        crawl_options (CrawlScheduler keyword arguments, {} for defaults), network requests
+        go through a per-host rate-limited, retrying queue.
+        """
+        self.timeout = timeout
+        self.cache = cache
+        self.session = requests.Session()
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+        self.scheduler = CrawlScheduler(self.session.get, **crawl_options) if crawl_options is not None else None
+    
+    def _send(self, url, priority, **kwargs):
+        if self.scheduler is not None:
+            return self.scheduler.get(url, priority, **kwargs)
+        return self.session.get(url, **kwargs)
+
+    def get(self, url, priority=INTERACTIVE, **kwargs):
+        """
+        GETs url through the pooled session. Returns the response, or None on a network error
+        or timeout (a stale cached copy is returned instead, if there is one). priority picks
+        the scheduler lane.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if self.cache is None:
+            try:
+                return self._send(url, priority, **kwargs)
+            except requests.RequestException:
+                return None
+
+        entry, fresh = self.cache.lookup(url)
+        if fresh:
+            cached = self.cache.serve(url, entry)
+            if cached is not None:
+                return cached
+        if entry is not None:
+            kwargs["headers"] = {**self.cache.conditional_headers(entry), **kwargs.get("headers", {})}
+        try:
+            response = self._send(url, priority, **kwargs)
+        except requests.RequestException:
+            return self.cache.serve(url, entry) if entry is not None else None
+        if response.status_code == 304 and entry is not None:
+            cached = self.cache.serve(url, entry, revalidated=True, response=response)
+            if cached is not None:
+                return cached
+            kwargs["headers"] = {key: value for key, value in kwargs["headers"].items()
+                                 if key not in ("If-None-Match", "If-Modified-Since")}
+            return self.get(url, priority, **kwargs)
+        return self.cache.store(url, response)
+
+    def first_result(self, urls, extract, usable=bool):
+        """
+        Calls extract(url) for every url concurrently and returns the first result that
+        usable() accepts, as soon as it arrives, or None. Fetches not yet started are
+        cancelled; ones already in flight finish in the background and are ignored.
+        """
+        done = threading.Event()
+
+        def attempt(url):
+            return None if done.is_set() else extract(url)
+
+        pending = {self.executor.submit(attempt, url) for url in urls}
+        try:
+            while pending:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future.exception() is None and usable(future.result()):
+                        return future.result()
+            return None
+        finally:
+            done.set()
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.scheduler is not None:
+            self.scheduler.close()
+        self.session.close()
\ No newline at end of file
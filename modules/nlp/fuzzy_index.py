@@ -0,0 +1,137 @@
+# Character bigram candidate index in front of fuzzywuzzy scoring
+import math
+from collections import Counter, defaultdict
+from fuzzywuzzy import fuzz, utils
+
+class FuzzyIndex:
+    def __init__(self, phrases=()):
+        """
+        Finds the phrase with the best fuzz.ratio against a query without scoring every
+        phrase. A ratio above the cutoff needs a long enough common subsequence, which bounds
+        both the length of a matching phrase and how many padded character bigrams it must
+        share with the query; only phrases passing both bounds are scored, so the result is
+        the same as a full scan. Each phrase can carry an owner (for example the category a
+        key belongs to), so a lookup needs no second scan.
+        """
+        self.phrases = []
+        self.positions = {}
+        self.owners = {}
+        self.processed = []
+        self.postings = defaultdict(lambda: defaultdict(dict))  # bigram -> length -> {position: count}
+        self.lengths = defaultdict(set)  # processed length -> positions, for cutoffs too low to need a shared bigram
+        for phrase in phrases:
+            self.add(phrase)
+
+    @staticmethod
+    def trigrams(text):
+        """Returns the padded character trigrams of text after fuzzywuzzy's own preprocessing."""
+        processed = f" {utils.full_process(text)} "
+        return {processed[i:i + 3] for i in range(len(processed) - 2)}
+
+    @staticmethod
+    def bigrams(processed):
+        """Counts the character bigrams of an already processed string padded with a space on each side."""
+        padded = f" {processed} "
+        return Counter(padded[i:i + 2] for i in range(len(padded) - 1))
+
+    def add(self, phrase, owner=None):
+        """Adds a phrase to the index. Duplicates keep their original position and first owner."""
+        if phrase in self.positions:
+            return
+        position = len(self.phrases)
+        processed = utils.full_process(phrase)
+        self.phrases.append(phrase)
+        self.processed.append(processed)
+        self.positions[phrase] = position
+        self.owners[phrase] = owner
+        self.lengths[len(processed)].add(position)
+        for gram, count in self.bigrams(processed).items():
+            self.postings[gram][len(processed)][position] = count
+
+    def remove(self, phrase):
+        """Drops a phrase from the index. Its position is left empty so the others keep their order."""
+        position = self.positions.pop(phrase, None)
+        if position is None:
+            return
+        del self.owners[phrase]
+        processed = self.processed[position]
+        self.phrases[position] = None
+        self.processed[position] = None
+        self.lengths[len(processed)].discard(position)
+        for gram in self.bigrams(processed):
+            by_length = self.postings[gram]
+            del by_length[len(processed)][position]
+            if not by_length[len(processed)]:
+                del by_length[len(processed)]
+                if not by_length:
+                    del self.postings[gram]
+
+    @staticmethod
+    def required_bigrams(query_length, length, score_cutoff):
+        """
+        Returns how many padded bigrams a phrase of length must share with a query of
+        query_length to score above score_cutoff, or None if it cannot at any overlap.
+        The score rounds 200 * M / (query_length + length) for a common subsequence of M
+        characters. Turning one string into the other deletes the other characters of each
+        and inserts them into the gaps; a deletion breaks at most two bigrams and an
+        insertion one, so at least 3 * M - total + 1 bigrams survive intact.
+        """
+        total = query_length + length
+        matched = math.ceil((math.floor(score_cutoff) + 0.5) * total / 200)
+        if matched > min(query_length, length):
+            return None
+        return 3 * matched - total + 1
+
+    def candidates(self, query, score_cutoff=75):
+        """Returns the phrases that could score above score_cutoff, in insertion order."""
+        return [self.phrases[position] for position in self._candidate_positions(utils.full_process(query), score_cutoff)]
+
+    def _candidate_positions(self, processed, score_cutoff):
+        if not processed:
+            return []
+        required = {}
+        shared = Counter()
+        for gram, count in self.bigrams(processed).items():
+            for length, entries in self.postings.get(gram, {}).items():
+                if length not in required:
+                    required[length] = self.required_bigrams(len(processed), length, score_cutoff)
+                if required[length] is None:
+                    continue
+                for position, stored in entries.items():
+                    shared[position] += min(count, stored)
+        positions = {position for position, count in shared.items() if count >= required[len(self.processed[position])]}
+        for length, members in self.lengths.items():  # Below a cutoff of about 67 no shared bigram is needed
+            needed = self.required_bigrams(len(processed), length, score_cutoff)
+            if needed is not None and needed <= 0:
+                positions |= members
+        return sorted(positions)
+
+    def extract_one(self, query, score_cutoff=75):
+        """Returns (phrase, score) for the first phrase with the best score above score_cutoff, or None."""
+        processed = utils.full_process(query)
+        best = None
+        for position in self._candidate_positions(processed, score_cutoff):
+            score = fuzz.ratio(processed, self.processed[position])
+            if score > score_cutoff and (best is None or score > best[1]):
+                best = (self.phrases[position], score)
+        return best
+
+    def best_match(self, query, score_cutoff=75):
+        """Returns (phrase, owner, score) for the best match scoring above score_cutoff, or None."""
+        closest = self.extract_one(query, score_cutoff)
+        if closest:
+            return closest[0], self.owners[closest[0]], closest[1]
+        return None
+
+    def __len__(self):
+        return len(self.positions)
+
+if __name__ == "__main__":
+    index = FuzzyIndex(["play music", "stop music", "what time is it", "tell me a joke"])
+    print("Candidates for 'ply musc':", index.candidates("ply musc"))
+    print("Best match for 'ply musc':", index.extract_one("ply musc"))
+
+    keys = FuzzyIndex()
+    keys.add("favorite_color", owner="Personal")
+    keys.add("project_deadline", owner="Work")
+    print("Best key for 'fav color':", keys.best_match("fav color"))
\ No newline at end of file
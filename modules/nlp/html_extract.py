@@ -0,0 +1,129 @@
+# Streaming HTML extraction that keeps only the text and links the scraper needs
+import re
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+WHITESPACE = re.compile(r"\s+")
+CHUNK_SIZE = 16384  # Characters fed to the parser between early-stop checks
+
+class _ParagraphParser(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.paragraphs = []  # Text pieces per <p>, in document order
+        self.open = []  # Indices of the <p> elements currently open, innermost last
+        self.closed_chars = 0  # Normalized length of the text of closed top-level paragraphs
+        self.in_code = 0  # Depth of <script>/<style>, whose text get_text() leaves out
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "p":
+            self.open.append(len(self.paragraphs))
+            self.paragraphs.append([])
+        elif tag in ("script", "style"):
+            self.in_code += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self.in_code = max(self.in_code - 1, 0)
+        elif tag == "p" and self.open:
+            index = self.open.pop()
+            if not self.open:
+                self.closed_chars += len(WHITESPACE.sub(" ", "".join(self.paragraphs[index]))) + 1
+
+    def handle_data(self, data):
+        if self.in_code:
+            return
+        for index in self.open:  # Nested paragraphs each contain the text, as get_text() does
+            self.paragraphs[index].append(data)
+
+def extract_paragraphs(html, max_chars=None):
+    """
+    Returns the whitespace-collapsed text of every <p>, matching BeautifulSoup's
+    " ".join(p.get_text() for p in soup.find_all("p")). Only paragraph text is kept, and with
+    max_chars parsing stops once that much text is collected, so the result is a prefix of
+    the full text at least max_chars long (or all of it).
+    """
+    parser = _ParagraphParser()
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        if max_chars is not None and parser.closed_chars >= max_chars and not parser.open:
+            break
+    else:
+        parser.close()
+    text = " ".join("".join(pieces) for pieces in parser.paragraphs)
+    return WHITESPACE.sub(" ", text).strip()
+
+class _ResultLinkParser(HTMLParser):
+    def __init__(self, limit):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.anchors = []  # hrefs of the <a> elements currently open, innermost last
+        self.headings = 0
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == "a":
+            self.anchors.append(dict(attrs).get("href"))
+        elif tag == "h3" and self.headings < self.limit:
+            self.headings += 1
+            if self.anchors and self.anchors[-1]:
+                self.links.append(self.anchors[-1])
+
+    def handle_endtag(self, tag):
+        if tag == "a" and self.anchors:
+            self.anchors.pop()
+
+def extract_result_links(html, base_url="", limit=5):
+    """
+    Returns the href of the link around each of the first limit <h3> headlines of a search
+    results page, resolved against base_url. Parsing stops after the limit-th headline.
+    """
+    parser = _ResultLinkParser(limit)
+    for start in range(0, len(html), CHUNK_SIZE):
+        parser.feed(html[start:start + CHUNK_SIZE])
+        if parser.headings >= limit:
+            break
+    return [urljoin(base_url, href) for href in parser.links]
+
+if __name__ == "__main__":
+    # Benchmark over saved pages: python html_extract.py [directory of .html files]
+    import glob
+    import os
+    import sys
+    import time
+    from bs4 import BeautifulSoup
+
+    def soup_paragraphs(html):
+        soup = BeautifulSoup(html, "html.parser")
+        return WHITESPACE.sub(" ", " ".join(p.get_text() for p in soup.find_all("p"))).strip()
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else "saved_pages"
+    pages = []
+    for path in glob.glob(os.path.join(directory, "*.htm*")):
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            pages.append(f.read())
+    if not pages:
+        print(f"No pages in {directory}/, using generated article pages")
+        filler = "<div class='nav'><a href='/x'>Link</a><span>menu item</span></div>" * 400
+        pages = [f"<html><head><script>var a = {i};</script></head><body>{filler}"
+                 + "".join(f"<p>Paragraph {j} of page {i} with <b>bold</b> &amp; plain text.</p>" for j in range(300))
+                 + f"{filler}</body></html>" for i in range(20)]
+
+    for page in pages:
+        full = soup_paragraphs(page)
+        assert extract_paragraphs(page) == full
+        assert full.startswith(extract_paragraphs(page, max_chars=500)[:500])
+
+    def bench(label, extract, rounds=3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for page in pages:
+                extract(page)
+        elapsed = (time.perf_counter() - start) / (rounds * len(pages))
+        print(f"{label:<36}{elapsed * 1000:>9.2f} ms/page")
+        return elapsed
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KiB average")
+    baseline = bench("BeautifulSoup html.parser", soup_paragraphs)
+    streaming = bench("Streaming paragraphs", extract_paragraphs)
+    early = bench("Streaming, stop at 500 chars", lambda page: extract_paragraphs(page, max_chars=500))
+    print(f"Speedup: {baseline / streaming:.1f}x full text, {baseline / early:.1f}x summary")
\ No newline at end of file
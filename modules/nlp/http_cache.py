@@ -0,0 +1,251 @@
+# Content-addressed on-disk cache of fetched pages with conditional revalidation
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from persistence import WriteBehind, atomic_write_json
+
+class CachedResponse:
+    """The parts of a requests.Response the scraper uses, rebuilt from a cache entry."""
+
+    def __init__(self, url, status_code, content, headers, encoding):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+        self.from_cache = True
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+class HTTPCache:
+    def __init__(self, cache_dir="http_cache", max_bytes=50 * 1024 * 1024, default_ttl=3600):
+        """
+        Stores page bodies zlib-compressed under the SHA-256 of their content, so pages shared
+        by several URLs are kept once. Entries are fresh for their Cache-Control max-age (or
+        default_ttl) and served without the network; stale ones are revalidated with their
+        ETag/Last-Modified. Least recently used entries are evicted past max_bytes on disk.
+        """
+        self.cache_dir = cache_dir
+        self.body_dir = os.path.join(cache_dir, "bodies")
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.writer = WriteBehind(self.snapshot, self.write_index, max_pending=20, max_delay=5.0)
+        self.lock = self.writer.lock  # Shared, so a background flush snapshots a consistent index
+        os.makedirs(self.body_dir, exist_ok=True)
+        self.entries = self.load_index()  # url -> entry, least recently used first
+        self.body_sizes = {}  # digest -> compressed size on disk
+        self.body_refs = {}  # digest -> number of entries using the body
+        self.total_bytes = 0
+        for entry in self.entries.values():
+            self._add_ref(entry["body"], entry["stored_size"])
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.bytes_saved = 0  # Body bytes served from disk instead of downloaded
+
+    def load_index(self):
+        if os.path.exists(self.index_file):
+            with open(self.index_file, "r") as f:
+                entries = json.load(f)
+            entries = {url: entry for url, entry in entries.items()
+                       if os.path.exists(self._body_path(entry["body"]))}
+            return OrderedDict(sorted(entries.items(), key=lambda item: item[1]["last_used"]))
+        return OrderedDict()
+
+    def snapshot(self):
+        return {url: dict(entry) for url, entry in self.entries.items()}
+
+    def write_index(self, data):
+        atomic_write_json(self.index_file, data, separators=(",", ":"))
+
+    def save_index(self):
+        with self.lock:
+            data = self.snapshot()
+        self.write_index(data)
+
+    def flush(self):
+        self.writer.flush()
+
+    def _body_path(self, digest):
+        return os.path.join(self.body_dir, digest[:2], digest + ".z")
+
+    def stored_bytes(self):
+        return self.total_bytes
+
+    def _add_ref(self, digest, size):
+        if digest not in self.body_refs:
+            self.body_refs[digest] = 0
+            self.body_sizes[digest] = size
+            self.total_bytes += size
+        self.body_refs[digest] += 1
+
+    def _release(self, digest):
+        """Drops one reference to a body and deletes it once no entry uses it."""
+        self.body_refs[digest] -= 1
+        if self.body_refs[digest]:
+            return
+        del self.body_refs[digest]
+        self.total_bytes -= self.body_sizes.pop(digest)
+        try:
+            os.remove(self._body_path(digest))
+        except FileNotFoundError:
+            pass
+
+    def _write_body(self, path, content):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(zlib.compress(content, 6))
+        os.replace(temp_path, path)
+
+    def lookup(self, url):
+        """Returns (entry, fresh) for url, or (None, False) when it has never been cached."""
+        with self.lock:
+            entry = self.entries.get(url)
+            if entry is None:
+                return None, False
+            return entry, entry["expires"] > time.time()
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def serve(self, url, entry, revalidated=False, response=None):
+        """
+        Builds a response from the cached body and counts the hit, or returns None if the body
+        is gone. A 304 response refreshes the entry's validators and expiry.
+        """
+        try:
+            with open(self._body_path(entry["body"]), "rb") as f:
+                content = zlib.decompress(f.read())
+        except FileNotFoundError:
+            with self.lock:  # Evicted by another thread since lookup
+                if self.entries.get(url) is entry:
+                    del self.entries[url]
+                    self._release(entry["body"])
+            return None
+        with self.lock:
+            if revalidated:
+                self.revalidated += 1
+                entry["expires"] = time.time() + self._ttl(response.headers)
+                entry["etag"] = response.headers.get("ETag", entry.get("etag"))
+                entry["last_modified"] = response.headers.get("Last-Modified", entry.get("last_modified"))
+            else:
+                self.hits += 1
+            self.bytes_saved += len(content)
+            entry["last_used"] = time.time()
+            if url in self.entries:
+                self.entries.move_to_end(url)
+            self.writer.mark_dirty()
+        return CachedResponse(entry["url"], entry["status"], content, {"Content-Type": entry.get("content_type", "")}, entry["encoding"])
+
+    def store(self, url, response):
+        """Caches a 200 response unless it forbids storage. Returns response unchanged."""
+        cache_control = response.headers.get("Cache-Control", "").lower()
+        with self.lock:
+            self.misses += 1
+        if response.status_code != 200 or "no-store" in cache_control:
+            return response
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._body_path(digest)
+        if not os.path.exists(path):
+            self._write_body(path, content)
+
+        with self.lock:
+            if digest not in self.body_refs and not os.path.exists(path):
+                self._write_body(path, content)  # Its last entry was evicted while we wrote it
+            self._add_ref(digest, self.body_sizes.get(digest) or os.path.getsize(path))
+            old = self.entries.pop(url, None)
+            if old is not None:
+                self._release(old["body"])
+            self.entries[url] = {
+                "body": digest,
+                "stored_size": self.body_sizes[digest],
+                "url": response.url,
+                "status": response.status_code,
+                "encoding": response.encoding,
+                "content_type": response.headers.get("Content-Type", ""),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires": time.time() + (0 if "no-cache" in cache_control else self._ttl(response.headers)),
+                "last_used": time.time()
+            }
+            self._evict()
+            self.writer.mark_dirty()
+        return response
+
+    def _ttl(self, headers):
+        match = re.search(r"max-age=(\d+)", headers.get("Cache-Control", ""))
+        return int(match.group(1)) if match else self.default_ttl
+
+    def _evict(self):
+        """Drops least recently used entries, and bodies no entry references, until under max_bytes."""
+        while self.entries and self.total_bytes > self.max_bytes:
+            _, entry = self.entries.popitem(last=False)
+            self._release(entry["body"])
+
+    def stats(self):
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.revalidated) / lookups if lookups else 0.0,
+            "bytes_saved": self.bytes_saved,
+            "entries": len(self.entries),
+            "stored_bytes": self.stored_bytes()
+        }
+
+if __name__ == "__main__":
+    # Local stand-in server that honours If-None-Match
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from fetch_engine import FetchEngine
+
+    PAGE = b"<html><body>" + b"<p>Cached paragraph.</p>" * 2000 + b"</body></html>"
+
+    class StandIn(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == '"v1"':
+                self.send_response(304)
+                self.send_header("ETag", '"v1"')
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Cache-Control", "max-age=1" if self.path == "/short" else "max-age=600")
+            self.send_header("Content-Length", str(len(PAGE)))
+            self.end_headers()
+            self.wfile.write(PAGE)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+
+    engine = FetchEngine(cache=HTTPCache("http_cache_demo"))
+    for path in ["/page", "/page", "/short", "/page"]:
+        response = engine.get(base + path)
+        print(f"GET {path}: {response.status_code}, from cache: {getattr(response, 'from_cache', False)}")
+    time.sleep(1.1)
+    response = engine.get(base + "/short")  # Stale, so revalidated with a conditional GET
+    print(f"GET /short after expiry: {response.status_code}, from cache: {getattr(response, 'from_cache', False)}")
+    print("Cache stats:", engine.cache.stats())
+    engine.cache.flush()
+    server.shutdown()
\ No newline at end of file
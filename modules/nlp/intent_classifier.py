@@ -0,0 +1,146 @@
+# Hashed n-gram linear intent classifier with a memory-mapped model file
+import json
+import os
+import re
+import zlib
+import numpy as np
+
+MODEL_MAGIC = b"AVSAISIC"
+HEADER_ALIGNMENT = 64
+
+class IntentClassifier:
+    def __init__(self, labels, idf, weights, bias):
+        """
+        Softmax-regression classifier over hashed word and character n-grams weighted by IDF.
+        Instances are created by train() or load(); load() keeps the arrays memory-mapped.
+        """
+        self.labels = list(labels)
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.n_features = len(idf)
+
+    @staticmethod
+    def feature_indices(text, n_features):
+        """Hashes the words, word bigrams and padded character trigrams of text into feature indices."""
+        words = re.sub(r"[^a-z0-9']+", " ", text.lower()).split()
+        padded = f" {' '.join(words)} "
+        grams = [f"w:{w}" for w in words]
+        grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return np.unique(np.fromiter((zlib.crc32(g.encode()) % n_features for g in grams), dtype=np.int64, count=len(grams)))
+
+    @classmethod
+    def train(cls, examples, n_features=2 ** 14, epochs=200, learning_rate=10.0, l2=1e-5, batch_size=256, seed=0):
+        """
+        Trains on (text, intent) pairs with mini-batch gradient descent. Only one dense batch
+        of features is materialised at a time, so training memory is bounded by batch_size.
+        """
+        examples = list(examples)
+        labels = sorted({intent for _, intent in examples})
+        label_ids = {label: i for i, label in enumerate(labels)}
+        indices = [cls.feature_indices(text, n_features) for text, _ in examples]
+        targets = np.array([label_ids[intent] for _, intent in examples], dtype=np.intp)
+
+        document_frequency = np.zeros(n_features, dtype=np.float32)
+        for idx in indices:
+            document_frequency[idx] += 1
+        idf = (np.log((1 + len(examples)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+        weights = np.zeros((n_features, len(labels)), dtype=np.float32)
+        bias = np.zeros(len(labels), dtype=np.float32)
+        rng = np.random.default_rng(seed)
+
+        for _ in range(epochs):
+            order = rng.permutation(len(examples))
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                x = np.zeros((len(batch), n_features), dtype=np.float32)
+                for row, i in enumerate(batch):
+                    x[row, indices[i]] = idf[indices[i]]
+                    x[row] /= np.linalg.norm(x[row]) or 1.0
+
+                probabilities = cls._softmax(x @ weights + bias)
+                probabilities[np.arange(len(batch)), targets[batch]] -= 1.0
+                probabilities /= len(batch)
+                weights -= learning_rate * (x.T @ probabilities + l2 * weights)
+                bias -= learning_rate * probabilities.sum(axis=0)
+
+        return cls(labels, idf, weights, bias)
+
+    @staticmethod
+    def _softmax(logits):
+        logits = logits - logits.max(axis=-1, keepdims=True)
+        exp = np.exp(logits)
+        return exp / exp.sum(axis=-1, keepdims=True)
+
+    def predict_proba(self, text):
+        """Returns the probability of every label for text."""
+        idx = self.feature_indices(text, self.n_features)
+        values = self.idf[idx]
+        norm = np.linalg.norm(values)
+        if norm:
+            values = values / norm
+        return self._softmax(values @ self.weights[idx] + self.bias)
+
+    def top_k(self, text, k=3):
+        """Returns the k most likely (intent, probability) pairs, best first."""
+        probabilities = self.predict_proba(text)
+        k = min(k, len(self.labels))
+        best = np.argpartition(-probabilities, k - 1)[:k]
+        best = best[np.argsort(-probabilities[best])]
+        return [(self.labels[i], float(probabilities[i])) for i in best]
+
+    def save(self, model_file):
+        """
+        Writes a compact binary model: magic, header length, a JSON header with the labels,
+        then the float32 idf, weight and bias arrays at an aligned offset.
+        """
+        header = json.dumps({"labels": self.labels, "n_features": self.n_features}).encode()
+        prefix = len(MODEL_MAGIC) + 4 + len(header)
+        padding = -prefix % HEADER_ALIGNMENT
+        with open(model_file, "wb") as f:
+            f.write(MODEL_MAGIC)
+            f.write(len(header).to_bytes(4, "little"))
+            f.write(header)
+            f.write(b"\0" * padding)
+            for array in (self.idf, self.weights, self.bias):
+                f.write(np.ascontiguousarray(array, dtype="<f4").tobytes())
+
+    @classmethod
+    def load(cls, model_file):
+        """Loads a model written by save(), memory-mapping the arrays instead of reading them."""
+        with open(model_file, "rb") as f:
+            if f.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f"{model_file} is not an intent classifier model.")
+            header_length = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_length))
+
+        labels, n_features = header["labels"], header["n_features"]
+        offset = len(MODEL_MAGIC) + 4 + header_length
+        offset += -offset % HEADER_ALIGNMENT
+        data = np.memmap(model_file, dtype="<f4", mode="r", offset=offset)
+        idf = data[:n_features]
+        weights = data[n_features:n_features * (1 + len(labels))].reshape(n_features, len(labels))
+        bias = data[n_features * (1 + len(labels)):]
+        return cls(labels, idf, weights, bias)
+
+def load_examples(examples_file):
+    """Loads logged training examples stored as a JSON list of {"text": ..., "intent": ...} records."""
+    if not os.path.exists(examples_file):
+        return []
+    with open(examples_file, "r") as f:
+        return [(entry["text"], entry["intent"]) for entry in json.load(f)]
+
+if __name__ == "__main__":
+    examples = [
+        ("play music", "music_play"), ("start a song", "music_play"), ("put on some tunes", "music_play"),
+        ("stop music", "music_stop"), ("pause the song", "music_stop"), ("turn the music off", "music_stop"),
+        ("what time is it", "time_check"), ("tell me the time", "time_check"), ("current time please", "time_check")
+    ]
+    classifier = IntentClassifier.train(examples)
+    classifier.save("intent_model.bin")
+    classifier = IntentClassifier.load("intent_model.bin")
+
+    for text in ["could you play a song", "pause it", "what's the time"]:
+        print(f"Input: {text} -> Top intents: {classifier.top_k(text, 2)}")
\ No newline at end of file
@@ -1,9 +1,41 @@
 # Intent recognition module with fuzzy matching and multiple intent detection
 import re
-from fuzzywuzzy import process
+import os
+import string
+import threading
+from collections import OrderedDict
+from itertools import islice
+import numpy as np
+from fuzzy_index import FuzzyIndex
+from intent_classifier import IntentClassifier
+
+PUNCTUATION_TO_SPACE = str.maketrans(string.punctuation, " " * len(string.punctuation))
+WORD = re.compile(r"\w+")
+PARTIAL_MATCH_CAP = 0.95  # Highest batch score for a phrase whose trigrams all appear but not as whole words
+
+def normalize_utterance(text):
+    """Lowercases text, turns punctuation into spaces and collapses whitespace."""
+    return " ".join(text.lower().translate(PUNCTUATION_TO_SPACE).split())
+
+def word_steps(text):
+    """
+    Splits text into word runs, each paired with the characters separating it from the
+    previous word ("" for the first), so a keyword matches exactly where \bkeyword\b would.
+    """
+    steps, end = [], None
+    for match in WORD.finditer(text):
+        steps.append((text[end:match.start()] if end is not None else "", match.group()))
+        end = match.end()
+    return steps
 
 class IntentRecognizer:
-    def __init__(self):
+    def __init__(self, model_file=None, keyword_confidence=0.75, model_confidence=0.3, cache_size=256):
+        # LRU of results keyed on the normalized utterance; cleared whenever the intents change
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()  # Sessions may recognize intents from several threads
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.intents = {
             "greeting": ["hello", "hi", "hey", "good morning", "good evening"],
             "farewell": ["bye", "goodbye", "see you", "later"],
@@ -23,29 +55,238 @@ class IntentRecognizer:
             "time_check": ["what time is it", "current time", "tell me the time"],
             "date_check": ["what's today's date", "current date", "tell me the date"]
         }
+        # Optional model-backed ranking; keyword/fuzzy matching is used when no model is trained
+        self.classifier = IntentClassifier.load(model_file) if model_file and os.path.exists(model_file) else None
+        self.keyword_confidence = keyword_confidence  # Minimum trigram containment for best_intent
+        self.model_confidence = model_confidence  # Minimum classifier probability for best_intent
 
-    def recognize_intent(self, text):
-        text = text.lower()
-        detected_intents = []
-        
-        for intent, keywords in self.intents.items():
+    @property
+    def intents(self):
+        return self._intents
+
+    @intents.setter
+    def intents(self, intents):
+        self._intents = intents
+        self.compile_intents()
+
+    def add_intent(self, intent, keywords):
+        """Adds keywords to an intent (creating it if needed) and recompiles the matcher."""
+        self._intents.setdefault(intent, []).extend(keywords)
+        self.compile_intents()
+
+    def remove_intent(self, intent):
+        """Removes an intent and recompiles the matcher."""
+        self._intents.pop(intent, None)
+        self.compile_intents()
+
+    def compile_intents(self):
+        """
+        Compiles the whole intent table into a word trie: each normalized keyword is a path of
+        (separator, word) steps ending in a node that names it. Matching walks the trie from
+        every word of the utterance, so it costs dict lookups per word instead of one regex
+        per keyword, and overlapping keywords are all found. Compiling is linear in the
+        total keyword length. Call this again after mutating the intent table in place.
+        """
+        self._keyword_table = [(intent, keyword) for intent, keywords in self._intents.items() for keyword in keywords]
+        unique_keywords = list(dict.fromkeys(keyword for _, keyword in self._keyword_table))
+        self._normalized_keywords = {keyword: normalize_utterance(keyword) for keyword in unique_keywords}
+
+        self._trie = {}  # (separator, word) -> child node; None -> keyword ending here
+        self._odd_keywords = {}  # Keywords not starting and ending in a word character keep a regex
+        for keyword in self._normalized_keywords.values():
+            steps = word_steps(keyword)
+            if not steps or steps[0][1] != keyword[:len(steps[0][1])] or not keyword.endswith(steps[-1][1]):
+                self._odd_keywords[keyword] = re.compile(rf"\b{re.escape(keyword)}\b")
+                continue
+            node = self._trie
+            for i, (separator, word) in enumerate(steps):
+                node = node.setdefault(("" if i == 0 else separator, word), {})
+            node[None] = keyword
+
+        # Fallback index: phrase -> first owning intent, plus bigram-bounded fuzzy scoring
+        self._phrase_intents = {}
+        for intent, keyword in self._keyword_table:
+            self._phrase_intents.setdefault(keyword, intent)
+        self._fuzzy_index = FuzzyIndex(unique_keywords)
+        self._compile_phrase_matrix()
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Drops every cached result and resets the hit/miss counters."""
+        with self._cache_lock:
+            self._cache.clear()
+            self.cache_hits = 0
+            self.cache_misses = 0
+
+    def cache_info(self):
+        """Reports hit/miss statistics for the utterance cache."""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+            "size": len(self._cache),
+            "max_size": self.cache_size
+        }
+
+    def _cached(self, kind, text, compute):
+        """Returns compute(normalized_text), memoized per (kind, normalized text) in the LRU."""
+        key = (kind, normalize_utterance(text))
+        with self._cache_lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return self._cache[key]
+            self.cache_misses += 1
+
+        result = compute(key[1])
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[key] = result
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def _compile_phrase_matrix(self):
+        """
+        Builds the phrase x trigram matrix used for batch scoring. Each row is weighted so
+        that a dot product with a binary utterance vector gives the fraction of the phrase's
+        trigrams present in the utterance. Rows are grouped by intent for a per-intent max.
+        """
+        self._trigram_columns = {}
+        rows, columns, weights, offsets, self._scored_intents = [], [], [], [], []
+        row = 0
+        for intent, keywords in self._intents.items():
+            if not keywords:
+                continue
+            self._scored_intents.append(intent)
+            offsets.append(row)
             for keyword in keywords:
-                if re.search(rf"\b{keyword}\b", text):
-                    detected_intents.append(intent)
+                grams = FuzzyIndex.trigrams(keyword)
+                for gram in grams:
+                    rows.append(row)
+                    columns.append(self._trigram_columns.setdefault(gram, len(self._trigram_columns)))
+                    weights.append(1.0 / len(grams))
+                row += 1
+
+        self._phrase_matrix = np.zeros((row, len(self._trigram_columns)), dtype=np.float32)
+        self._phrase_matrix[rows, columns] = weights
+        self._intent_offsets = np.array(offsets, dtype=np.intp)
+        self._intent_columns = {intent: column for column, intent in enumerate(self._scored_intents)}
+
+    def match_keywords(self, text):
+        """Returns the set of normalized keywords found in the normalized text in a single scan."""
+        steps = word_steps(text)
+        matched = set()
+        for start, (_, word) in enumerate(steps):
+            node = self._trie.get(("", word))
+            position = start + 1
+            while node is not None:
+                if None in node:
+                    matched.add(node[None])
+                if position == len(steps):
+                    break
+                node = node.get(steps[position])
+                position += 1
+        matched.update(keyword for keyword, pattern in self._odd_keywords.items() if pattern.search(text))
+        return matched
+
+    def recognize_intent(self, text):
+        return list(self._cached("intents", text, self._recognize_normalized))
+
+    def _keyword_intents(self, text):
+        """Returns the intent of every keyword found in the normalized text, in table order."""
+        matched = self.match_keywords(text)
+        return [intent for intent, keyword in self._keyword_table if self._normalized_keywords[keyword] in matched]
+
+    def _recognize_normalized(self, text):
+        detected_intents = self._keyword_intents(text)
 
         if not detected_intents:
             # Use fuzzy matching to find the closest intent
-            all_keywords = [kw for intent in self.intents.values() for kw in intent]
-            closest_match, confidence = process.extractOne(text, all_keywords)
-            if confidence > 75:
-                for intent, keywords in self.intents.items():
-                    if closest_match in keywords:
-                        return [intent]
+            closest = self._fuzzy_index.best_match(text)
+            if closest:
+                return [self._phrase_intents[closest[0]]]
 
             return ["unknown"]
 
         return detected_intents
 
+    def score_intents(self, texts):
+        """
+        Returns an (utterances x intents) array of confidences for a list of texts. An intent
+        with a keyword found on word boundaries, as recognize_intent matches them, scores 1.0;
+        the others score their best phrase's trigram containment, capped at PARTIAL_MATCH_CAP.
+        """
+        texts = [normalize_utterance(text) for text in texts]
+        utterances = np.zeros((len(texts), len(self._trigram_columns)), dtype=np.float32)
+        for i, text in enumerate(texts):
+            columns = [self._trigram_columns[gram] for gram in FuzzyIndex.trigrams(text) if gram in self._trigram_columns]
+            utterances[i, columns] = 1.0
+
+        phrase_scores = utterances @ self._phrase_matrix.T
+        if not len(self._intent_offsets):
+            return phrase_scores
+        scores = np.minimum(np.maximum.reduceat(phrase_scores, self._intent_offsets, axis=1), PARTIAL_MATCH_CAP)
+        for i, text in enumerate(texts):
+            scores[i, [self._intent_columns[intent] for intent in set(self._keyword_intents(text))]] = 1.0
+        return scores
+
+    def recognize_intents(self, texts, chunk_size=256, threshold=0.75):
+        """
+        Batch version of recognize_intent for replaying logged utterances. Texts are scored
+        against every intent phrase at once in chunks of chunk_size, so memory stays bounded
+        by the chunk rather than the corpus. Returns one list of (intent, confidence) pairs
+        per text, best first, or [("unknown", 0.0)] when nothing reaches the threshold.
+        As in recognize_intent, a text with keyword hits reports just those intents at 1.0;
+        otherwise its intents are ranked by trigram containment.
+        """
+        results = []
+        texts = iter(texts)
+        while True:
+            chunk = list(islice(texts, chunk_size))
+            if not chunk:
+                return results
+            scores = self.score_intents(chunk)
+            for row in scores:
+                ranked = np.flatnonzero(row == 1.0)
+                if not len(ranked):
+                    ranked = np.flatnonzero(row >= threshold)
+                ranked = ranked[np.argsort(-row[ranked], kind="stable")]
+                results.append([(self._scored_intents[i], round(float(row[i]), 4)) for i in ranked] or [("unknown", 0.0)])
+
+    def train_classifier(self, examples=(), model_file="intent_model.bin"):
+        """
+        Trains the model-backed mode from the intent phrase table plus logged (text, intent)
+        examples, saves it to model_file and switches ranking over to the memory-mapped model.
+        """
+        training_set = [(keyword, intent) for intent, keyword in self._keyword_table] + list(examples)
+        IntentClassifier.train(training_set).save(model_file)
+        self.classifier = IntentClassifier.load(model_file)
+        self.clear_cache()
+
+    def rank_intents(self, text, top_k=3):
+        """
+        Returns up to top_k (intent, confidence) pairs, best first. Uses the trained classifier
+        when one is loaded, otherwise the trigram containment scores of score_intents.
+        """
+        if self.classifier is not None:
+            return self.classifier.top_k(text, top_k)
+        scores = self.score_intents([text])[0]
+        ranked = np.argsort(-scores, kind="stable")[:top_k]
+        return [(self._scored_intents[i], round(float(scores[i]), 4)) for i in ranked if scores[i] > 0]
+
+    def best_intent(self, text):
+        """Returns the top ranked intent, or "unknown" if it is below the active mode's confidence."""
+        return self._cached("best", text, self._best_normalized)
+
+    def _best_normalized(self, text):
+        ranked = self.rank_intents(text, top_k=1)
+        threshold = self.model_confidence if self.classifier is not None else self.keyword_confidence
+        if ranked and ranked[0][1] >= threshold:
+            return ranked[0][0]
+        return "unknown"
+
 if __name__ == "__main__":
     recognizer = IntentRecognizer()
     test_inputs = [
@@ -58,4 +299,34 @@ if __name__ == "__main__":
     
     for text in test_inputs:
         intents = recognizer.recognize_intent(text)
-        print(f"Input: {text} -> Recognized Intents: {intents}")
\ No newline at end of file
+        print(f"Input: {text} -> Recognized Intents: {intents}")
+
+    print("Batch scoring:", recognizer.recognize_intents(test_inputs[:3], chunk_size=2))
+    print("Ranked intents:", recognizer.rank_intents("Can you play some music?"))
+
+    for text in ["Play music!", "play   MUSIC", "What time is it?"]:
+        recognizer.recognize_intent(text)
+    print("Cache statistics:", recognizer.cache_info())
+
+    # Keyword matching at scale: a table of hundreds of phrases against the per-keyword regex loop
+    import random
+    import time
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(400)] + "play stop music game launch set timer what time weather".split()
+    utterances = [" ".join(rng.choice(vocabulary) for _ in range(12)) for _ in range(300)]
+    for size in (300, 1000):
+        large = IntentRecognizer()
+        start = time.perf_counter()
+        large.intents = {f"intent{i}": [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))) for _ in range(3)]
+                         for i in range(size // 3)}
+        compile_seconds = time.perf_counter() - start
+        keywords = set(large._normalized_keywords.values())
+        start = time.perf_counter()
+        matches = [large.match_keywords(text) for text in utterances]
+        trie_us = (time.perf_counter() - start) / len(utterances) * 1e6
+        start = time.perf_counter()
+        expected = [{keyword for keyword in keywords if re.search(rf"\b{re.escape(keyword)}\b", text)} for text in utterances]
+        loop_us = (time.perf_counter() - start) / len(utterances) * 1e6
+        assert matches == expected
+        print(f"{size} phrases: compiled in {compile_seconds:.3f}s, {trie_us:.0f} us/utterance "
+              f"(per-keyword regex loop {loop_us:.0f} us)")
\ No newline at end of file
@@ -1,75 +1,179 @@
-import json
-import os
-from fuzzywuzzy import process
-from reinforcement_learning import ReinforcementLearning
-from web_scraper import WebScraper
+import components
+from fuzzy_index import FuzzyIndex
+from knowledge_index import tokenize
+from knowledge_store import JSONKnowledgeStore, SQLiteKnowledgeStore
+from query_cache import QueryCache
+from simhash import FingerprintIndex, simhash
+from web_scraper import NO_RESULTS, RESULT_PREFIX, WEB_CATEGORY
+
+DEFAULT_FILES = {"json": "knowledge.json", "sqlite": "knowledge.db"}
+MIN_DEDUPE_TOKENS = 20  # Shorter facts differ in a word or two, which SimHash cannot tell from a near-duplicate
 
 class KnowledgeBase:
-    def __init__(self, knowledge_file="knowledge.json"):
+    def __init__(self, knowledge_file=None, storage="json", on_duplicate="keep"):
+        """
+        storage selects the backend: "json" keeps knowledge_file in memory (small installs),
+        "sqlite" treats knowledge_file as a SQLite database with full-text search. Without
+        knowledge_file each backend uses its own default file (knowledge.json or knowledge.db).
+        on_duplicate is the default add_fact policy for near-duplicate facts.
+        """
+        knowledge_file = knowledge_file or DEFAULT_FILES[storage]
         self.knowledge_file = knowledge_file
-        self.knowledge = self.load_knowledge()
-        self.reinforcement = ReinforcementLearning()
-        self.web_scraper = WebScraper()
+        self.store = SQLiteKnowledgeStore(knowledge_file) if storage == "sqlite" else JSONKnowledgeStore(knowledge_file)
+        self.on_duplicate = on_duplicate
+        self._fingerprints = None
+        self._build_indexes()
+        self.reinforcement = components.get_reinforcement()
+        self.web_cache = QueryCache()  # Remembers web lookups, including misses, per query
+    
+    @property
+    def web_scraper(self):
+        return components.get_web_scraper()  # Built on the first web lookup, not with the knowledge base
+    
+    def _build_indexes(self):
+        self.category_index = FuzzyIndex(self.store.categories())
+        self.key_index = FuzzyIndex()
+        for category, key in self.store.keys():
+            self.key_index.add(key, owner=category)
+    
+    @property
+    def fingerprints(self):
+        """SimHash index of every stored fact long enough to compare, built on the first add_fact."""
+        if self._fingerprints is None:
+            index = FingerprintIndex()
+            for fact in self.store.facts():
+                if self.comparable(fact[2]):
+                    index.add(tuple(fact), simhash(fact[2]), group=fact[0])
+            self._fingerprints = index
+        return self._fingerprints
     
-    def load_knowledge(self):
-        if os.path.exists(self.knowledge_file):
-            with open(self.knowledge_file, "r") as f:
-                return json.load(f)
-        return {}
+    @staticmethod
+    def comparable(value):
+        """Whether value has enough tokens for near-duplicate detection."""
+        return len(tokenize(value)) >= MIN_DEDUPE_TOKENS
+    
+    def find_near_duplicate(self, category, fingerprint, index=None):
+        """Returns the closest stored (category, key, value) in category within the index's distance, or None."""
+        matches = (self.fingerprints if index is None else index).near(fingerprint, group=category)
+        return matches[0][0] if matches else None
+    
+    def _forget(self, facts):
+        """Drops the keys and categories of removed facts from the fuzzy indexes once nothing is stored under them."""
+        for category, key, _ in facts:
+            if self.store.get(category, key) is None and self.key_index.owners.get(key) == category:
+                self.key_index.remove(key)
+                for other in self.store.categories():  # Another category may still hold the same key
+                    if self.store.get(other, key) is not None:
+                        self.key_index.add(key, owner=other)
+                        break
+            if not self.store.has_category(category):
+                self.category_index.remove(category)
     
     def save_knowledge(self):
-        with open(self.knowledge_file, "w") as f:
-            json.dump(self.knowledge, f, indent=4)
+        self.store.save()
+    
+    def import_json(self, knowledge_file):
+        """Imports a knowledge.json into an empty store and indexes the imported facts. Returns False if the store had facts."""
+        imported = self.store.import_json(knowledge_file)
+        if imported:
+            self._build_indexes()
+            self._fingerprints = None
+        return imported
+    
+    def add_fact(self, category, key, value, on_duplicate=None):
+        """
+        Stores a fact. on_duplicate (defaulting to the knowledge base's policy, "keep") decides
+        what happens when it nearly duplicates a fact already in its category: "skip" keeps
+        the existing fact, "replace" swaps it for the new value, "keep" stores both. Facts
+        under MIN_DEDUPE_TOKENS tokens are never treated as duplicates.
+        Returns True if the value was stored.
+        """
+        value = value[:500]  # Store only first 500 characters for summarization
+        policy = on_duplicate or self.on_duplicate
+        comparable = self.comparable(value)
+        fingerprint = simhash(value) if comparable else None
+        duplicate = None if policy == "keep" or not comparable else self.find_near_duplicate(category, fingerprint)
+        if duplicate is not None:
+            if policy == "skip":
+                return False
+            self.store.replace(duplicate, category, key, value)
+            self.fingerprints.remove(duplicate)
+            self._forget([duplicate])
+        else:
+            self.store.add(category, key, value)
+        if comparable:
+            self.fingerprints.add((category, key, value), fingerprint, group=category)
+        self.category_index.add(category)
+        self.key_index.add(key, owner=category)
+        return True
     
-    def add_fact(self, category, key, value):
-        if category not in self.knowledge:
-            self.knowledge[category] = {}
-        if key not in self.knowledge[category]:
-            self.knowledge[category][key] = []
-        self.knowledge[category][key].append(value[:500])  # Store only first 500 characters for summarization
-        self.save_knowledge()
+    def dedupe(self, category=WEB_CATEGORY):
+        """
+        Bulk pass over the existing store: keeps the first of every group of near-duplicate
+        facts within category and deletes the rest. Only scraped content is swept by
+        default; category=None sweeps every category. Returns the number of facts removed.
+        """
+        index, duplicates = FingerprintIndex(), []
+        for fact in self.store.facts():
+            fact = tuple(fact)
+            if not self.comparable(fact[2]):
+                continue
+            fingerprint = simhash(fact[2])
+            if category in (None, fact[0]) and self.find_near_duplicate(fact[0], fingerprint, index) is not None:
+                duplicates.append(fact)
+            else:
+                index.add(fact, fingerprint, group=fact[0])
+        if duplicates:
+            self.store.remove_many(duplicates)
+            self._forget(duplicates)
+        self._fingerprints = index
+        return len(duplicates)
     
     def get_fact(self, category, key):
-        if category in self.knowledge and key in self.knowledge[category]:
+        values = self.store.get(category, key)
+        if values:
             self.reinforcement.provide_feedback(key, 1)  # Reinforcement learning tracks frequently accessed knowledge
-            return self.knowledge[category][key]
+            return values
         return ["I don't have information on that."]
     
     def search_knowledge(self, query):
         query = query.lower()
-        results = {}
-        
-        # Search through categories, keys, and values
-        for category, facts in self.knowledge.items():
-            if query in category.lower():
-                results[category] = facts
-            for key, values in facts.items():
-                if query in key.lower() or any(query in v.lower() for v in values):
-                    results.setdefault(category, {})[key] = values
+        results = self.store.search(query)
         
         if results:
             return results
         
         # Fuzzy Matching for Similar Results (Categories, Keys, and Values)
-        all_categories = list(self.knowledge.keys())
-        closest_category_match = process.extractOne(query, all_categories)
-        if closest_category_match and closest_category_match[1] > 75:
-            return {closest_category_match[0]: self.knowledge[closest_category_match[0]]}
+        closest_category_match = self.category_index.best_match(query)
+        if closest_category_match:
+            return {closest_category_match[0]: self.store.category_facts(closest_category_match[0])}
         
-        all_keys = [key for cat in self.knowledge.values() for key in cat]
-        closest_key_match = process.extractOne(query, all_keys)
-        if closest_key_match and closest_key_match[1] > 75:
-            for category in self.knowledge:
-                if closest_key_match[0] in self.knowledge[category]:
-                    return {category: {closest_key_match[0]: self.get_fact(category, closest_key_match[0])}}
+        closest_key_match = self.key_index.best_match(query)
+        if closest_key_match:
+            key, category, _ = closest_key_match
+            return {category: {key: self.get_fact(category, key)}}
 
-        # If no knowledge is found, trigger web scraping
-        print("No matching information found. Searching the web...")
-        web_result = self.web_scraper.fetch_information(query)
+        # If no knowledge is found, trigger web scraping (repeated queries are answered from the cache)
+        web_result = self.web_cache.get_or_fetch(query, self.search_web, is_negative=self.is_empty_web_result,
+                                                 is_transient=self.is_transient_web_result)
         return web_result if web_result else "Still couldn't find relevant information."
+    
+    def search_web(self, query):
+        print("No matching information found. Searching the web...")
+        return self.web_scraper.fetch_information(query)
+    
+    @staticmethod
+    def is_empty_web_result(result):
+        """A search that ran and found nothing; cached as a miss."""
+        return result == NO_RESULTS
+    
+    @staticmethod
+    def is_transient_web_result(result):
+        """Anything but stored information or an empty search, such as a failed fetch; not cached."""
+        return not (result and (result.startswith(RESULT_PREFIX) or result == NO_RESULTS))
 
 if __name__ == "__main__":
-    knowledge = KnowledgeBase()
+    knowledge = components.get_knowledge_base()
     
     # Example: Adding categorized facts to the knowledge base
     knowledge.add_fact("Programming", "Python", "Python is a programming language known for its simplicity.")
@@ -84,3 +188,14 @@ if __name__ == "__main__":
     print("Searching for 'Pythn' (fuzzy match):", knowledge.search_knowledge("Pythn"))
     print("Searching for 'Sciense' (fuzzy category match):", knowledge.search_knowledge("Sciense"))
     print("Searching for unknown topic (triggers web search):", knowledge.search_knowledge("Quantum Computing"))
+    
+    # Example: Near-duplicate scraped content is not stored twice
+    scraped = "Quantum computers use qubits, which can represent a 0 and a 1 at the same time, to solve certain problems faster."
+    print("Stored first copy:", knowledge.add_fact(WEB_CATEGORY, "quantum computers", scraped, on_duplicate="skip"))
+    print("Stored near-duplicate:", knowledge.add_fact(WEB_CATEGORY, "what are quantum computers", scraped.replace("faster", "much faster"), on_duplicate="skip"))
+    print("Near-duplicates removed by bulk pass:", knowledge.dedupe())
+
+    # Example: Moving the JSON store into SQLite with ranked full-text search
+    sqlite_knowledge = KnowledgeBase(storage="sqlite")
+    sqlite_knowledge.import_json("knowledge.json")  # Only imports into an empty database
+    print("SQLite search for 'python':", sqlite_knowledge.search_knowledge("python"))
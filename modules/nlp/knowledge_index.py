@@ -0,0 +1,103 @@
+# Token-level inverted index over knowledge base categories, keys and values
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text):
+    """Splits text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+class KnowledgeIndex:
+    def __init__(self, knowledge=None):
+        """
+        Maps word tokens to the categories whose names contain them and to the
+        (category, key) facts whose key or values contain them. Built once from the
+        loaded knowledge and kept current with add_fact() and remove_fact().
+        """
+        self.category_postings = defaultdict(set)
+        self.fact_postings = defaultdict(set)
+        self.vocabulary = []  # Sorted, for prefix lookups
+        for category, facts in (knowledge or {}).items():
+            self.add_category(category)
+            for key, values in facts.items():
+                self.add_fact(category, key, *values)
+
+    def _post(self, postings, text, entry):
+        for token in set(tokenize(text)):
+            if token not in self.category_postings and token not in self.fact_postings:
+                insort(self.vocabulary, token)
+            postings[token].add(entry)
+
+    def _unpost(self, postings, tokens, entry):
+        for token in tokens:
+            entries = postings.get(token)
+            if entries is None:
+                continue
+            entries.discard(entry)
+            if not entries:
+                del postings[token]
+                if token not in self.category_postings and token not in self.fact_postings:
+                    del self.vocabulary[bisect_left(self.vocabulary, token)]
+
+    def add_category(self, category):
+        """Indexes the tokens of a category name."""
+        self._post(self.category_postings, category, category)
+
+    def add_fact(self, category, key, *values):
+        """Indexes the tokens of a fact's key and of any new values stored under it."""
+        self.add_category(category)
+        self._post(self.fact_postings, key, (category, key))
+        for value in values:
+            self._post(self.fact_postings, value, (category, key))
+
+    def remove_category(self, category):
+        """Unindexes a category that no longer holds any facts."""
+        self._unpost(self.category_postings, set(tokenize(category)), category)
+
+    def remove_fact(self, category, key, value, remaining=()):
+        """
+        Unindexes one deleted value of a fact. remaining are the values still stored under
+        the key, whose tokens (and the key's, while any remain) stay posted.
+        """
+        kept = set(tokenize(" ".join(remaining)))
+        if remaining:
+            kept |= set(tokenize(key))
+        self._unpost(self.fact_postings, (set(tokenize(value)) | set(tokenize(key))) - kept, (category, key))
+
+    def expand(self, token):
+        """Returns every indexed token that starts with token."""
+        start = bisect_left(self.vocabulary, token)
+        end = start
+        while end < len(self.vocabulary) and self.vocabulary[end].startswith(token):
+            end += 1
+        return self.vocabulary[start:end]
+
+    def _candidates(self, postings, query_tokens):
+        candidates = None
+        for token in query_tokens:
+            matches = set()
+            for expanded in self.expand(token):
+                matches |= postings.get(expanded, set())
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return set()
+        return candidates or set()
+
+    def lookup(self, query):
+        """
+        Returns (categories, facts) that may contain query: every query token must prefix a
+        token of the same entry. Callers verify the exact substring on this shortlist, so a
+        query only matches text at the start of a word.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return set(), set()
+        return self._candidates(self.category_postings, query_tokens), self._candidates(self.fact_postings, query_tokens)
+
+if __name__ == "__main__":
+    index = KnowledgeIndex({"Programming": {"Python": ["Python is a programming language."]}})
+    index.add_fact("AI", "Machine Learning", "A subset of AI that enables systems to learn from data.")
+    print("Lookup 'learn':", index.lookup("learn"))
+    print("Lookup 'programming language':", index.lookup("programming language"))
\ No newline at end of file
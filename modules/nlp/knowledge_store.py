@@ -0,0 +1,252 @@
+# Storage backends for the knowledge base: in-memory JSON or SQLite with FTS5
+import json
+import os
+import sqlite3
+import threading
+from knowledge_index import KnowledgeIndex, tokenize
+
+class JSONKnowledgeStore:
+    def __init__(self, knowledge_file="knowledge.json"):
+        """Keeps the whole knowledge file in memory with an inverted index. Suited to small installs."""
+        self.knowledge_file = knowledge_file
+        self.knowledge = self.load()
+        self.index = KnowledgeIndex(self.knowledge)
+
+    def load(self):
+        if os.path.exists(self.knowledge_file):
+            with open(self.knowledge_file, "r") as f:
+                return json.load(f)
+        return {}
+
+    def save(self):
+        with open(self.knowledge_file, "w") as f:
+            json.dump(self.knowledge, f, indent=4)
+
+    def import_json(self, knowledge_file):
+        """
+        One-shot import of another knowledge.json into this store. Does nothing and returns
+        False if the store already holds facts, so repeated runs add no copies.
+        """
+        if self.knowledge:
+            return False
+        with open(knowledge_file, "r") as f:
+            knowledge = json.load(f)
+        for category, facts in knowledge.items():
+            for key, values in facts.items():
+                self.knowledge.setdefault(category, {}).setdefault(key, []).extend(values)
+                self.index.add_fact(category, key, *values)
+        self.save()
+        return True
+
+    def add(self, category, key, value):
+        self.knowledge.setdefault(category, {}).setdefault(key, []).append(value)
+        self.index.add_fact(category, key, value)
+        self.save()
+
+    def get(self, category, key):
+        """Returns the values stored under category/key, or None."""
+        return self.knowledge.get(category, {}).get(key)
+
+    def categories(self):
+        return list(self.knowledge)
+
+    def category_facts(self, category):
+        return self.knowledge.get(category, {})
+
+    def keys(self):
+        """Yields every (category, key) pair."""
+        for category, facts in self.knowledge.items():
+            for key in facts:
+                yield category, key
+    
+    def facts(self):
+        """Yields every (category, key, value) in insertion order."""
+        for category, facts in self.knowledge.items():
+            for key, values in facts.items():
+                for value in values:
+                    yield category, key, value
+    
+    def has_category(self, category):
+        return category in self.knowledge
+    
+    def _remove(self, category, key, value):
+        values = self.knowledge.get(category, {}).get(key, [])
+        if value not in values:
+            return
+        values.remove(value)
+        self.index.remove_fact(category, key, value, values)
+        if not values:
+            del self.knowledge[category][key]
+            if not self.knowledge[category]:
+                del self.knowledge[category]
+                self.index.remove_category(category)
+    
+    def remove_many(self, facts):
+        """Deletes one stored copy of each (category, key, value), dropping emptied keys and categories."""
+        for fact in facts:
+            self._remove(*fact)
+        self.save()
+    
+    def replace(self, old, category, key, value):
+        """Swaps the stored (category, key, value) old for a new fact with a single write."""
+        self._remove(*old)
+        self.knowledge.setdefault(category, {}).setdefault(key, []).append(value)
+        self.index.add_fact(category, key, value)
+        self.save()
+
+    def search(self, query):
+        """
+        Returns {category: facts} for categories, keys or values containing query, checking
+        only the shortlist from the inverted index.
+        """
+        query = query.lower()
+        results = {}
+        candidate_categories, candidate_facts = self.index.lookup(query)
+        matched_categories = {category for category in candidate_categories if query in category.lower()}
+        for category in matched_categories:
+            results[category] = self.knowledge[category]
+        for category, key in sorted(candidate_facts):
+            if category in matched_categories:
+                continue  # Whole category already included
+            values = self.knowledge[category][key]
+            if query in key.lower() or any(query in v.lower() for v in values):
+                results.setdefault(category, {})[key] = values
+        return results
+
+    def close(self):
+        pass
+
+class SQLiteKnowledgeStore:
+    def __init__(self, db_file="knowledge.db"):
+        """
+        Stores facts in SQLite with an FTS5 table over category, key and value, so inserts
+        are incremental and searches are ranked without loading the store into memory.
+        """
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.lock = threading.RLock()  # The connection is shared between threads, so calls on it take turns
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock, self.conn:
+            self.conn.execute('''CREATE TABLE IF NOT EXISTS facts (
+                                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                                    category TEXT NOT NULL,
+                                    key TEXT NOT NULL,
+                                    value TEXT NOT NULL)''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS facts_category_key ON facts (category, key)")
+            self.conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS facts_fts USING fts5(
+                                    category, key, value, content='facts', content_rowid='id')''')
+
+    def _insert(self, category, key, value):
+        cursor = self.conn.execute("INSERT INTO facts (category, key, value) VALUES (?, ?, ?)", (category, key, value))
+        self.conn.execute("INSERT INTO facts_fts (rowid, category, key, value) VALUES (?, ?, ?, ?)",
+                          (cursor.lastrowid, category, key, value))
+
+    def add(self, category, key, value):
+        with self.lock, self.conn:
+            self._insert(category, key, value)
+
+    def add_many(self, facts):
+        """Inserts an iterable of (category, key, value) facts in a single transaction."""
+        with self.lock, self.conn:
+            for category, key, value in facts:
+                self._insert(category, key, value)
+
+    def _delete(self, category, key, value):
+        row = self.conn.execute("SELECT id FROM facts WHERE category = ? AND key = ? AND value = ? ORDER BY id LIMIT 1",
+                                (category, key, value)).fetchone()
+        if row is None:
+            return
+        self.conn.execute("INSERT INTO facts_fts (facts_fts, rowid, category, key, value) VALUES ('delete', ?, ?, ?, ?)",
+                          (row[0], category, key, value))
+        self.conn.execute("DELETE FROM facts WHERE id = ?", (row[0],))
+
+    def import_json(self, knowledge_file):
+        """
+        One-shot import of an existing knowledge.json into this database. Does nothing and
+        returns False if the database already holds facts, so repeated runs add no copies.
+        """
+        with self.lock:
+            if self.conn.execute("SELECT 1 FROM facts LIMIT 1").fetchone() is not None:
+                return False
+            with open(knowledge_file, "r") as f:
+                knowledge = json.load(f)
+            self.add_many((category, key, value)
+                          for category, facts in knowledge.items()
+                          for key, values in facts.items()
+                          for value in values)
+            return True
+
+    def save(self):
+        pass  # Every write is committed in its own transaction
+
+    def _fetch(self, sql, parameters=()):
+        with self.lock:
+            return self.conn.execute(sql, parameters).fetchall()
+
+    def get(self, category, key):
+        rows = self._fetch("SELECT value FROM facts WHERE category = ? AND key = ? ORDER BY id", (category, key))
+        return [row[0] for row in rows] or None
+
+    def categories(self):
+        return [row[0] for row in self._fetch("SELECT DISTINCT category FROM facts")]
+
+    def category_facts(self, category):
+        facts = {}
+        for key, value in self._fetch("SELECT key, value FROM facts WHERE category = ? ORDER BY id", (category,)):
+            facts.setdefault(key, []).append(value)
+        return facts
+
+    def keys(self):
+        return self._fetch("SELECT DISTINCT category, key FROM facts")
+    
+    def facts(self):
+        return self._fetch("SELECT category, key, value FROM facts ORDER BY id")
+    
+    def has_category(self, category):
+        return bool(self._fetch("SELECT 1 FROM facts WHERE category = ? LIMIT 1", (category,)))
+    
+    def remove_many(self, facts):
+        """Deletes one stored copy of each (category, key, value) in a single transaction."""
+        with self.lock, self.conn:
+            for fact in facts:
+                self._delete(*fact)
+    
+    def replace(self, old, category, key, value):
+        """Swaps the stored (category, key, value) old for a new fact in one transaction."""
+        with self.lock, self.conn:
+            self._delete(*old)
+            self._insert(category, key, value)
+
+    def search(self, query, limit=50):
+        """
+        Returns {category: {key: values}} for the best BM25-ranked matches, best first.
+        Every query token must match as a word prefix in one of the three columns.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return {}
+        match = " AND ".join(f'"{token}"*' for token in tokens)
+        rows = self._fetch('''SELECT DISTINCT facts.category, facts.key FROM facts_fts
+                              JOIN facts ON facts.id = facts_fts.rowid
+                              WHERE facts_fts MATCH ? ORDER BY bm25(facts_fts) LIMIT ?''',
+                           (match, limit))
+        results = {}
+        for category, key in rows:
+            results.setdefault(category, {})[key] = self.get(category, key)
+        return results
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+if __name__ == "__main__":
+    store = SQLiteKnowledgeStore(":memory:")
+    store.add_many([
+        ("Programming", "Python", "Python is a programming language known for its simplicity."),
+        ("AI", "Machine Learning", "A subset of AI that enables systems to learn from data."),
+        ("Science", "Gravity", "Gravity is a force that pulls objects toward Earth.")
+    ])
+    print("Ranked search for 'learn data':", store.search("learn data"))
+    print("Ranked search for 'python':", store.search("python"))
\ No newline at end of file
@@ -0,0 +1,153 @@
+# Per-stage latency spans and histograms for the command pipeline
+import json
+import math
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+ENABLED = os.getenv("AVSAIS_LATENCY", "0") == "1"  # Set to 1 to record spans from startup
+
+# Log-scale buckets from 1 µs upwards, each ~9% wider than the last, so percentiles are
+# accurate to a few percent whatever the stage's scale
+BUCKET_BASE = 1e-6
+BUCKET_GROWTH = 2 ** (1 / 8)
+_LOG_GROWTH = math.log(BUCKET_GROWTH)
+_NO_SPAN = nullcontext()
+
+class Histogram:
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, seconds):
+        bucket = int(math.log(seconds / BUCKET_BASE) / _LOG_GROWTH) if seconds > BUCKET_BASE else 0
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile, clamped to the observed range."""
+        if not self.count:
+            return 0.0
+        rank, seen = q / 100 * self.count, 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(max(BUCKET_BASE * BUCKET_GROWTH ** (bucket + 1), self.min), self.max)
+        return self.max
+
+    def summary(self):
+        ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            "count": self.count,
+            "mean_ms": ms(self.total / self.count) if self.count else 0.0,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+            "max_ms": ms(self.max)
+        }
+
+_histograms = {}
+_lock = threading.Lock()
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+def disable():
+    global ENABLED
+    ENABLED = False
+
+def record(stage, seconds):
+    with _lock:
+        histogram = _histograms.get(stage)
+        if histogram is None:
+            histogram = _histograms[stage] = Histogram()
+        histogram.record(seconds)
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.stage, time.perf_counter() - self.start)
+        return False
+
+def span(stage):
+    """
+    Context manager timing its block under stage. When recording is disabled this is a
+    shared no-op, so spans can stay in hot paths.
+    """
+    return _Span(stage) if ENABLED else _NO_SPAN
+
+def timed(stage=None):
+    """Decorator timing every call of the function; stage defaults to its qualified name."""
+    def decorator(func):
+        name = stage or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def report():
+    """Returns {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}}."""
+    with _lock:
+        return {stage: histogram.summary() for stage, histogram in sorted(_histograms.items())}
+
+def dump(path=None):
+    """Writes the per-stage breakdown as JSON to path, or prints it as a table when path is None."""
+    stages = report()
+    if path:
+        with open(path, "w") as f:
+            json.dump(stages, f, indent=4)
+        return stages
+    print(f"{'stage':<28}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}  (ms)")
+    for stage, row in stages.items():
+        print(f"{stage:<28}{row['count']:>8}{row['mean_ms']:>10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}")
+    return stages
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+if __name__ == "__main__":
+    import random
+
+    @timed("demo.decorated")
+    def work():
+        time.sleep(random.uniform(0.001, 0.005))
+
+    enable()
+    for _ in range(200):
+        work()
+        with span("demo.block"):
+            sum(range(1000))
+    dump()
+
+    disable()
+    start = time.perf_counter()
+    for _ in range(100000):
+        with span("demo.block"):
+            pass
+    print(f"Disabled span overhead: {(time.perf_counter() - start) * 10:.3f} µs per span")
\ No newline at end of file
@@ -1,16 +1,30 @@
 import json
 import os
 from collections import deque
-from fuzzywuzzy import process
-from reinforcement_learning import ReinforcementLearning
+from contextlib import nullcontext
+import components
+from fuzzy_index import FuzzyIndex
+from persistence import WriteBehind, atomic_write_json
 
 class MemoryModule:
-    def __init__(self, memory_file="memory.json", history_limit=10):
+    def __init__(self, memory_file="memory.json", history_limit=10, write_behind=True, flush_every=20, flush_interval=5.0):
+        """
+        With write_behind, mutations are buffered and the file is rewritten after flush_every
+        changes, flush_interval seconds, or at shutdown; otherwise every change is saved.
+        """
         self.memory_file = memory_file
         self.history_limit = history_limit
         self.memory = self.load_memory()
         self.conversation_history = deque(self.memory.get("conversation_history", []), maxlen=history_limit)
-        self.reinforcement = ReinforcementLearning()
+        self.reinforcement = components.get_reinforcement()
+        self.key_index = FuzzyIndex()
+        for category, facts in self.memory.items():
+            if isinstance(facts, dict):
+                for key in facts:
+                    self.key_index.add(key, owner=category)
+        self.writer = WriteBehind(self.snapshot, self.write_memory, flush_every, flush_interval) if write_behind else None
+        self.closed = False
+        self.reopen = None
 
     def load_memory(self):
         if os.path.exists(self.memory_file):
@@ -18,18 +32,60 @@ class MemoryModule:
                 return json.load(f)
         return {}
 
+    def snapshot(self):
+        """Copies the memory deep enough that later mutations don't reach a write in progress."""
+        data = {category: {key: list(values) for key, values in facts.items()} if isinstance(facts, dict) else facts
+                for category, facts in self.memory.items()}
+        data["conversation_history"] = list(self.conversation_history)
+        return data
+
+    def write_memory(self, data):
+        atomic_write_json(self.memory_file, data, separators=(",", ":"))
+
     def save_memory(self):
-        self.memory["conversation_history"] = list(self.conversation_history)
-        with open(self.memory_file, "w") as f:
-            json.dump(self.memory, f, indent=4)
+        with self._lock():
+            data = self.snapshot()
+        self.write_memory(data)
+
+    def _changed(self):
+        if self.writer:
+            self.writer.mark_dirty()
+        else:
+            self.save_memory()
+
+    def flush(self):
+        """Writes any buffered changes to disk now."""
+        if self.writer:
+            self.writer.flush()
+
+    def close(self, reopen=None):
+        """
+        Stops accepting changes and writes out the buffered ones. Later changes are passed on
+        to the module reopen() returns (such as the session reloaded from the file), or
+        raise RuntimeError without one.
+        """
+        with self._lock():
+            self.closed = True
+            self.reopen = reopen
+        self.flush()
+
+    def _reopened(self):
+        if self.reopen is None:
+            raise RuntimeError(f"MemoryModule for {self.memory_file} is closed")
+        return self.reopen()
 
     def remember(self, category, key, value):
-        if category not in self.memory:
-            self.memory[category] = {}
-        if key not in self.memory[category]:
-            self.memory[category][key] = []
-        self.memory[category][key].append(value)
-        self.save_memory()
+        with self._lock():
+            if not self.closed:
+                if category not in self.memory:
+                    self.memory[category] = {}
+                if key not in self.memory[category]:
+                    self.memory[category][key] = []
+                self.memory[category][key].append(value)
+                self.key_index.add(key, owner=category)
+                self._changed()
+                return
+        self._reopened().remember(category, key, value)
 
     def recall(self, category, key):
         if category in self.memory and key in self.memory[category]:
@@ -37,18 +93,24 @@ class MemoryModule:
             return self.memory[category][key]
         
         # Fuzzy matching for misremembered terms
-        all_keys = [k for cat in self.memory.values() for k in cat]
-        closest_match, confidence = process.extractOne(key, all_keys)
-        if closest_match and confidence > 75:
-            for category in self.memory:
-                if closest_match in self.memory[category]:
-                    return self.memory[category][closest_match]
+        closest_match = self.key_index.best_match(key)
+        if closest_match:
+            closest_key, owner, _ = closest_match
+            return self.memory[owner][closest_key]
         
         return "I don't remember that."
 
     def add_to_history(self, user_input, response):
-        self.conversation_history.append({"user": user_input, "ai": response})
-        self.save_memory()
+        with self._lock():
+            if not self.closed:
+                self.conversation_history.append({"user": user_input, "ai": response})
+                self._changed()
+                return
+        self._reopened().add_to_history(user_input, response)
+
+    def _lock(self):
+        # Mutations hold the writer's lock so a background flush never sees a half-applied change
+        return self.writer.lock if self.writer else nullcontext()
 
     def get_history(self, last_n=5):
         return list(self.conversation_history)[-last_n:]
@@ -66,4 +128,7 @@ if __name__ == "__main__":
 
     # Adding conversation history
     memory.add_to_history("Hey there!", "Hello! How can I assist you?")
-    print("Last 3 conversations:", memory.get_history(3))
\ No newline at end of file
+    print("Last 3 conversations:", memory.get_history(3))
+
+    memory.flush()
+    print("Write-behind flush cost:", memory.writer.stats())
\ No newline at end of file
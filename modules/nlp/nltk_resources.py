@@ -0,0 +1,76 @@
+# Lazy, process-wide loading of NLTK corpora and models
+import os
+from functools import lru_cache
+
+# Where each downloadable resource lives inside nltk_data
+RESOURCE_PATHS = {
+    "stopwords": "corpora/stopwords",
+    "wordnet": "corpora/wordnet",
+    "omw-1.4": "corpora/omw-1.4",
+    "vader_lexicon": "sentiment/vader_lexicon.zip"
+}
+AUTO_DOWNLOAD = os.getenv("NLTK_AUTO_DOWNLOAD", "1") != "0"  # Set to 0 to never touch the network
+_missing = {}  # name -> error message; lru_cache does not keep exceptions, so failures are remembered here
+
+@lru_cache(maxsize=None)
+def ensure_resource(name):
+    """
+    Checks once per process that an NLTK resource is available locally, downloading it
+    only if it is missing and downloads are allowed. Raises LookupError otherwise; a failed
+    lookup or download is not retried for the rest of the process.
+    """
+    if name in _missing:
+        raise LookupError(_missing[name])
+    import nltk
+    try:
+        nltk.data.find(RESOURCE_PATHS[name])
+        return True
+    except LookupError:
+        pass
+
+    if AUTO_DOWNLOAD and nltk.download(name, quiet=True):
+        return True
+    _missing[name] = f"NLTK resource '{name}' is not installed. Run: python -m nltk.downloader {name}"
+    raise LookupError(_missing[name])
+
+@lru_cache(maxsize=None)
+def get_stopwords(language="english"):
+    """Returns the stopword set for a language, loaded on first use."""
+    ensure_resource("stopwords")
+    from nltk.corpus import stopwords
+    return frozenset(stopwords.words(language))
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    """Returns a shared WordNet lemmatizer, loaded on first use."""
+    ensure_resource("wordnet")
+    ensure_resource("omw-1.4")
+    from nltk.stem import WordNetLemmatizer
+    return WordNetLemmatizer()
+
+@lru_cache(maxsize=None)
+def get_stemmer():
+    """Returns a shared Porter stemmer."""
+    from nltk.stem import PorterStemmer
+    return PorterStemmer()
+
+@lru_cache(maxsize=None)
+def get_word_tokenizer():
+    """Returns a shared Treebank word tokenizer."""
+    from nltk.tokenize import TreebankWordTokenizer
+    return TreebankWordTokenizer()
+
+@lru_cache(maxsize=None)
+def get_sentiment_analyzer():
+    """Returns a shared VADER sentiment analyzer, loading the lexicon on first use."""
+    ensure_resource("vader_lexicon")
+    from nltk.sentiment import SentimentIntensityAnalyzer
+    return SentimentIntensityAnalyzer()
+
+if __name__ == "__main__":
+    for resource in RESOURCE_PATHS:
+        try:
+            ensure_resource(resource)
+            print(f"✅ {resource} available")
+        except LookupError as e:
+            print(f"❌ {e}")
\ No newline at end of file
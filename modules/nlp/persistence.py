@@ -0,0 +1,142 @@
+# Atomic JSON writes and write-behind flushing for the NLP data files
+import atexit
+import heapq
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """
+    Writes data to a temporary file next to path and renames it into place, so readers
+    and crashes only ever see the old or the new file, never a truncated one.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+_active_writers = weakref.WeakSet()
+
+@atexit.register
+def flush_all():
+    """Flushes every live WriteBehind; runs automatically at interpreter shutdown."""
+    for writer in list(_active_writers):
+        writer.flush()
+
+class _Flusher:
+    """One daemon thread that runs every scheduled WriteBehind flush, so callers never write inline."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.due = []  # Heap of (deadline, sequence, weak reference to writer)
+        self.sequence = itertools.count()
+        self.thread = None
+
+    def schedule(self, writer, delay):
+        with self.condition:
+            heapq.heappush(self.due, (time.monotonic() + delay, next(self.sequence), weakref.ref(writer)))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True, name="write-behind")
+                self.thread.start()
+            self.condition.notify()
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.due or self.due[0][0] > time.monotonic():
+                    self.condition.wait(self.due[0][0] - time.monotonic() if self.due else None)
+                _, _, ref = heapq.heappop(self.due)
+            writer = ref()
+            if writer is not None:
+                try:
+                    writer.flush()
+                except Exception:
+                    writer.failed_flushes += 1  # Changes stay pending and are retried on the next schedule
+
+_flusher = _Flusher()
+
+class WriteBehind:
+    def __init__(self, snapshot, write=None, max_pending=20, max_delay=5.0):
+        """
+        Buffers mutations and has a background thread persist them once max_pending have
+        accumulated, max_delay seconds after the first unflushed one, or at shutdown.
+        snapshot() runs under lock and must return a copy of the data; write(data) then
+        persists it outside the lock, so mutations and reads never wait on disk I/O.
+        Without write, snapshot() is a self-contained flush, still run outside the lock.
+        """
+        self._snapshot = snapshot
+        self._write = write
+        self.max_pending = max_pending
+        self.max_delay = max_delay
+        self.pending = 0
+        self.scheduled = False  # A timed flush is queued for the current pending changes
+        self.lock = threading.RLock()
+        self.write_lock = threading.Lock()  # Keeps writes in snapshot order
+        self.flush_count = 0
+        self.failed_flushes = 0
+        self.last_flush_seconds = 0.0
+        self.total_flush_seconds = 0.0
+        _active_writers.add(self)
+
+    def mark_dirty(self):
+        """Records a mutation and, at most, signals the background flusher. Never writes itself."""
+        with self.lock:
+            self.pending += 1
+            if self.pending == self.max_pending:
+                _flusher.schedule(self, 0)
+            elif not self.scheduled:
+                self.scheduled = True
+                _flusher.schedule(self, self.max_delay)
+
+    def request_flush(self):
+        """Asks the background flusher to write pending changes as soon as possible."""
+        _flusher.schedule(self, 0)
+
+    def flush(self):
+        """Writes out buffered mutations, if any, in the calling thread and records how long it took."""
+        with self.write_lock:
+            with self.lock:
+                if not self.pending:
+                    return
+                pending = self.pending
+                self.pending = 0
+                self.scheduled = False
+                start = time.perf_counter()
+                data = self._snapshot() if self._write else None
+            try:
+                if self._write:
+                    self._write(data)
+                else:
+                    self._snapshot()
+            except BaseException:
+                with self.lock:
+                    self.pending += pending
+                    if not self.scheduled:
+                        self.scheduled = True
+                        _flusher.schedule(self, self.max_delay)
+                raise
+            self.last_flush_seconds = time.perf_counter() - start
+            self.total_flush_seconds += self.last_flush_seconds
+            self.flush_count += 1
+
+    def stats(self):
+        """Reports pending mutations and flush cost."""
+        return {
+            "pending": self.pending,
+            "flushes": self.flush_count,
+            "failed_flushes": self.failed_flushes,
+            "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+            "avg_flush_ms": round(self.total_flush_seconds * 1000 / self.flush_count, 3) if self.flush_count else 0.0
+        }
\ No newline at end of file
@@ -0,0 +1,131 @@
+# Persistent query-result cache with TTLs, negative caching and in-flight collapsing
+import json
+import os
+import threading
+import time
+from persistence import WriteBehind, atomic_write_json
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class QueryCache:
+    def __init__(self, cache_file="query_cache.json", ttl=7 * 24 * 3600, negative_ttl=3600, flush_every=20, flush_interval=5.0):
+        """
+        Remembers the result of slow lookups per normalized query. Results are kept for ttl
+        seconds and misses (negative results) for negative_ttl seconds. Concurrent calls
+        for the same query share a single fetch. New entries reach the file in the
+        background after flush_every of them, flush_interval seconds, or at shutdown.
+        """
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.writer = WriteBehind(self.snapshot, self.write_cache, flush_every, flush_interval)
+        self.lock = self.writer.lock  # Shared, so a flush never sees a half-applied change
+        self.in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0  # Calls that waited on another caller's fetch
+        self.entries = self.load_cache()
+
+    def load_cache(self):
+        """Loads cached entries from disk, dropping any that have expired."""
+        if os.path.exists(self.cache_file):
+            with open(self.cache_file, "r") as f:
+                entries = json.load(f)
+            now = time.time()
+            return {query: entry for query, entry in entries.items() if entry["expires"] > now}
+        return {}
+
+    def snapshot(self):
+        """Drops expired entries and returns a copy of the rest for writing."""
+        now = time.time()
+        self.entries = {query: entry for query, entry in self.entries.items() if entry["expires"] > now}
+        return dict(self.entries)
+
+    def write_cache(self, data):
+        atomic_write_json(self.cache_file, data)
+
+    def flush(self):
+        """Writes any buffered entries to disk now."""
+        self.writer.flush()
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(query.lower().split())
+
+    def get(self, query):
+        """Returns (True, value) for a fresh entry, otherwise (False, None)."""
+        entry = self.entries.get(self.normalize(query))
+        if entry and entry["expires"] > time.time():
+            return True, entry["value"]
+        return False, None
+
+    def put(self, query, value, negative=False):
+        """Stores a result, using the negative TTL for misses."""
+        ttl = self.negative_ttl if negative else self.ttl
+        with self.lock:
+            self.entries[self.normalize(query)] = {"value": value, "negative": negative, "expires": time.time() + ttl}
+            self.writer.mark_dirty()
+
+    def get_or_fetch(self, query, fetch, is_negative=lambda value: not value, is_transient=lambda value: False):
+        """
+        Returns the cached result for query, or calls fetch(query) and caches it. Only one
+        fetch per query runs at a time; concurrent callers wait for it and share its result.
+        A result is_transient says may differ on a retry (a timeout, say) is returned but
+        not cached.
+        """
+        key = self.normalize(query)
+        with self.lock:
+            found, value = self.get(key)
+            if found:
+                self.hits += 1
+                return value
+            call = self.in_flight.get(key)
+            leader = call is None
+            if leader:
+                self.misses += 1
+                call = self.in_flight[key] = _InFlight()
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fetch(query)
+            if not is_transient(call.value):
+                self.put(key, call.value, negative=is_negative(call.value))
+            return call.value
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+            call.done.set()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "collapsed": self.collapsed, "entries": len(self.entries), "in_flight": len(self.in_flight)}
+
+if __name__ == "__main__":
+    cache = QueryCache("query_cache_demo.json", negative_ttl=60)
+
+    def slow_lookup(query):
+        time.sleep(0.5)
+        return None  # Simulate a miss
+
+    threads = [threading.Thread(target=cache.get_or_fetch, args=("Quantum Computing", slow_lookup)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print("After 5 concurrent identical misses:", cache.stats())
+    print("Repeat lookup served from cache:", cache.get_or_fetch("quantum   computing", slow_lookup), cache.stats())
+    cache.flush()
+    print("Write-behind flush cost:", cache.writer.stats())
\ No newline at end of file
@@ -1,71 +1,315 @@
+import heapq
 import json
 import os
+import time
 from collections import deque
+import numpy as np
+import components
+from persistence import WriteBehind, atomic_write_json
 
 class ReinforcementLearning:
-    def __init__(self, learning_file="learning_data.json", history_limit=10, decay_factor=0.9, min_confidence=0.5):
+    @classmethod
+    def shared(cls, learning_file="learning_data.json", **options):
+        """
+        Returns the process-wide store for learning_file, creating it on first use. Components
+        should use this instead of constructing their own copy, so the file is loaded once and
+        written by a single coalescing writer. options only apply when the store is created.
+        The store lives in the components registry under its absolute path, so it is shared
+        even when this module is also imported under a package name (nlp.reinforcement_learning).
+        """
+        path = os.path.abspath(learning_file)
+        return components.get_component(("reinforcement", path), lambda: cls(path, **options))
+    
+    def __init__(self, learning_file="learning_data.json", history_limit=10, decay_factor=0.9, min_confidence=0.5,
+                 history_depth=20, archive_file=None, flush_every=50, flush_interval=5.0,
+                 decay_mode="step", half_life=7 * 24 * 3600):
         self.learning_file = learning_file
         self.history_limit = history_limit  # Limits how much recent feedback matters
         self.decay_factor = decay_factor  # Older actions gradually lose impact
+        # "step" multiplies by decay_factor on every feedback; "time" halves rewards every
+        # half_life seconds, applied lazily when scores are read
+        self.decay_mode = decay_mode
+        self.half_life = half_life
+        self.decay_epoch = time.time()
         self.min_confidence = min_confidence  # Minimum confidence required to suggest an action
-        self.learning_data = self.load_learning_data()
+        self.history_depth = history_depth  # Details kept per action; older ones are dropped or archived
+        self.archive_file = archive_file  # Optional append-only JSON-lines file for evicted details
+        self.archive_buffer = []
         self.recent_actions = deque(maxlen=history_limit)  # Tracks recent actions for weighted learning
+        self.writer = WriteBehind(self._snapshot, self._write, flush_every, flush_interval)
+        self.load_learning_data()
+        if self.archive_buffer:
+            self.writer.mark_dirty()  # History trimmed on load still has to reach the archive
+    
+    def _reset_table(self, capacity=64):
+        """
+        Actions live in parallel NumPy arrays indexed by row: feedback counts, decayed reward
+        sums, and the count and sum of each action's rewards inside the recent window. Scores
+        are cached per row and a lazy max-heap over them serves best/top-k queries.
+        """
+        self.actions = []
+        self.rows = {}
+        self.histories = []
+        self.counts = np.zeros(capacity, dtype=np.int64)
+        self.reward_sums = np.zeros(capacity, dtype=np.float64)
+        self.recent_counts = np.zeros(capacity, dtype=np.int64)
+        self.recent_sums = np.zeros(capacity, dtype=np.float64)
+        self.scores = np.zeros(capacity, dtype=np.float64)
+        self.score_heap = []
+    
+    def _row(self, action):
+        """Returns the row for action, appending a new one (and growing the arrays) if needed."""
+        row = self.rows.get(action)
+        if row is not None:
+            return row
+        row = len(self.actions)
+        if row == len(self.counts):
+            for name in ("counts", "reward_sums", "recent_counts", "recent_sums", "scores"):
+                array = getattr(self, name)
+                setattr(self, name, np.concatenate([array, np.zeros_like(array)]))
+        self.actions.append(action)
+        self.rows[action] = row
+        self.histories.append(deque(maxlen=self.history_depth))
+        return row
     
     def load_learning_data(self):
+        learning_data = {}
         if os.path.exists(self.learning_file):
             with open(self.learning_file, "r") as f:
-                return json.load(f)
-        return {}
+                learning_data = json.load(f)
+        
+        self._reset_table(max(64, len(learning_data)))
+        for action, data in learning_data.items():
+            row = self._row(action)
+            self.counts[row] = data["count"]
+            self.reward_sums[row] = data["reward_sum"] * self._time_scale(data.get("updated_at", self.decay_epoch))
+            history = data.get("history", [])
+            self._archive(action, history[:-self.history_depth] if len(history) > self.history_depth else [])
+            self.histories[row].extend(history)
+        self._rescore()
+    
+    def _time_scale(self, timestamp):
+        """
+        In time mode reward sums are stored scaled to decay_epoch, so a reward at timestamp is
+        worth 2 ** ((timestamp - epoch) / half_life) stored units and all rows share one read
+        scale. Always 1 in step mode.
+        """
+        if self.decay_mode != "time":
+            return 1.0
+        return 2.0 ** ((timestamp - self.decay_epoch) / self.half_life)
+    
+    def _effective_sums(self, rows, now=None):
+        """Reward sums of rows as of now, with time decay applied."""
+        return self.reward_sums[rows] / self._time_scale(time.time() if now is None else now)
+    
+    def _rebase_epoch(self, now):
+        """Moves decay_epoch forward before the stored scale can overflow."""
+        if self.decay_mode == "time" and now - self.decay_epoch > 256 * self.half_life:
+            self.reward_sums[:len(self.actions)] /= self._time_scale(now)
+            self.decay_epoch = now
+    
+    @property
+    def learning_data(self):
+        """Snapshot of the action table in the on-disk {action: {count, reward_sum, history}} layout."""
+        with self.writer.lock:
+            now = time.time()
+            sums = self._effective_sums(np.arange(len(self.actions)), now)
+            snapshot = {action: {"count": int(self.counts[row]), "reward_sum": float(sums[row]),
+                                 "history": list(self.histories[row])}
+                        for row, action in enumerate(self.actions)}
+            if self.decay_mode == "time":
+                for entry in snapshot.values():
+                    entry["updated_at"] = now
+            return snapshot
+    
+    def _snapshot(self):
+        """Takes the table and the pending archive entries under the lock, for _write to persist without it."""
+        archive, self.archive_buffer = self.archive_buffer, []
+        return self.learning_data, archive
+    
+    def _write(self, data):
+        learning_data, archive = data
+        if self.archive_file and archive:
+            with open(self.archive_file, "a") as f:
+                f.writelines(json.dumps(entry, separators=(",", ":")) + "\n" for entry in archive)
+        atomic_write_json(self.learning_file, learning_data, separators=(",", ":"))
     
     def save_learning_data(self):
-        with open(self.learning_file, "w") as f:
-            json.dump(self.learning_data, f, indent=4)
+        """Writes the compact learning file atomically and appends evicted history to the archive."""
+        with self.writer.lock:
+            data = self._snapshot()
+        self._write(data)
+    
+    def flush(self):
+        """Writes pending feedback to disk now instead of waiting for the write-behind threshold."""
+        self.writer.flush()
+    
+    def _archive(self, action, details):
+        if self.archive_file:
+            self.archive_buffer.extend({"action": action, "details": detail} for detail in details)
+    
+    def _score_rows(self, rows, weighted=True):
+        """Vectorized get_action_score for an array of rows."""
+        counts = self.counts[rows]
+        base = np.divide(self._effective_sums(rows), counts, out=np.zeros(len(rows)), where=counts > 0)
+        if not weighted:
+            return base
+        recent_counts = self.recent_counts[rows]
+        weight = recent_counts / self.history_limit
+        recent_mean = np.divide(self.recent_sums[rows], recent_counts, out=np.zeros(len(rows)), where=recent_counts > 0)
+        return np.where(recent_counts > 0, base * (1 - weight) + recent_mean * weight, base)
+    
+    def _update_scores(self, rows):
+        """Refreshes the cached score of the given rows and pushes them onto the heap."""
+        if self.decay_mode == "time":
+            return  # Time-decayed scores drift, so top_actions computes them at read time
+        rows = np.unique(np.asarray(rows, dtype=np.intp))
+        self.scores[rows] = self._score_rows(rows)
+        for row in rows.tolist():
+            heapq.heappush(self.score_heap, (-self.scores[row], row))
+        if len(self.score_heap) > 4 * len(self.actions) + 64:
+            self._rescore()  # Drop stale heap entries
+    
+    def _rescore(self):
+        """Recomputes every score at once and rebuilds the heap."""
+        rows = np.arange(len(self.actions))
+        self.scores[rows] = self._score_rows(rows)
+        self.score_heap = [(-score, row) for row, score in enumerate(self.scores[rows].tolist())]
+        heapq.heapify(self.score_heap)
+    
+    def _record_recent(self, action, reward):
+        """Adds (action, reward) to the recent window, retiring the entry it pushes out."""
+        touched = [self.rows[action]]
+        if len(self.recent_actions) == self.history_limit:
+            old_action, old_reward = self.recent_actions[0]
+            old_row = self.rows.get(old_action)
+            if old_row is not None:
+                self.recent_counts[old_row] -= 1
+                self.recent_sums[old_row] -= old_reward
+                touched.append(old_row)
+        self.recent_actions.append((action, reward))
+        self.recent_counts[touched[0]] += 1
+        self.recent_sums[touched[0]] += reward
+        return touched
     
     def provide_feedback(self, action, reward, details="None"):
         """
         Updates the reinforcement learning system with user feedback and tracks details of the action.
         """
-        if action not in self.learning_data:
-            self.learning_data[action] = {"count": 0, "reward_sum": 0, "history": []}
-        
-        self.learning_data[action]["count"] += 1
-        self.learning_data[action]["reward_sum"] += reward
-        self.learning_data[action]["history"].append(details)
-        
-        # Apply decay to older rewards
-        self.learning_data[action]["reward_sum"] *= self.decay_factor
-        
-        # Store recent actions for weighted learning
-        self.recent_actions.append((action, reward))
-        
-        self.save_learning_data()
+        with self.writer.lock:
+            row = self._row(action)
+            self.counts[row] += 1
+            self._append_history(row, details)
+            
+            if self.decay_mode == "time":
+                now = time.time()
+                self._rebase_epoch(now)
+                self.reward_sums[row] += reward * self._time_scale(now)
+            else:
+                # Apply decay to older rewards
+                self.reward_sums[row] = (self.reward_sums[row] + reward) * self.decay_factor
+            
+            # Store recent actions for weighted learning
+            self._update_scores(self._record_recent(action, reward))
+            
+            # Saves are coalesced, so read paths that record feedback never rewrite the file inline
+            self.writer.mark_dirty()
+    
+    def _append_history(self, row, details):
+        history = self.histories[row]
+        if len(history) == self.history_depth:
+            self._archive(self.actions[row], [history[0]])  # Oldest detail falls out of the ring buffer
+        history.append(details)
+    
+    def provide_feedback_batch(self, events):
+        """
+        Applies many feedback events at once and persists once for the whole batch.
+        Each event is (action, reward), (action, reward, details) or (action, reward, details,
+        timestamp); timestamps only matter in time decay mode. Counts and decayed reward sums
+        are updated with array operations, giving the same result as calling
+        provide_feedback for each event in order.
+        """
+        events = [tuple(event) for event in events]
+        if not events:
+            return
+        with self.writer.lock:
+            now = time.time()
+            rows = np.array([self._row(event[0]) for event in events], dtype=np.intp)
+            rewards = np.array([event[1] for event in events], dtype=np.float64)
+            for row, event in zip(rows.tolist(), events):
+                self._append_history(row, event[2] if len(event) > 2 else "None")
+            
+            touched, per_row = np.unique(rows, return_counts=True)
+            self.counts[touched] += per_row
+            
+            if self.decay_mode == "time":
+                self._rebase_epoch(now)
+                timestamps = np.array([event[3] if len(event) > 3 else now for event in events], dtype=np.float64)
+                scales = 2.0 ** ((timestamps - self.decay_epoch) / self.half_life)
+                np.add.at(self.reward_sums, rows, rewards * scales)
+            else:
+                # Event j of n for a row is decayed (n - j) more times by the later events of that row
+                order = np.argsort(rows, kind="stable")
+                starts = np.repeat(np.cumsum(per_row) - per_row, per_row)
+                position = np.empty(len(rows), dtype=np.int64)
+                position[order] = np.arange(len(rows)) - starts
+                remaining = per_row[np.searchsorted(touched, rows)] - position
+                additions = np.zeros(len(self.counts))
+                np.add.at(additions, rows, rewards * self.decay_factor ** remaining)
+                self.reward_sums[touched] = self.reward_sums[touched] * self.decay_factor ** per_row + additions[touched]
+            
+            # Only the last history_limit events can still be in the recent window
+            recent_touched = []
+            for event in events[-self.history_limit:]:
+                recent_touched += self._record_recent(event[0], event[1])
+            self._update_scores(np.concatenate([touched, np.array(recent_touched, dtype=np.intp)]))
+            
+            self.writer.mark_dirty()
+        self.writer.request_flush()  # One background write for the whole batch
     
     def get_action_score(self, action, weighted=True):
         """
         Returns the average reward score of an action.
         Uses weighted learning, giving more importance to recent feedback.
         """
-        if action not in self.learning_data or self.learning_data[action]["count"] == 0:
-            return 0  # Default score if no data is available
-        
-        base_score = self.learning_data[action]["reward_sum"] / self.learning_data[action]["count"]
-        
-        if weighted and action in dict(self.recent_actions):
-            recent_rewards = [r for a, r in self.recent_actions if a == action]
-            weight_factor = len(recent_rewards) / self.history_limit
-            return base_score * (1 - weight_factor) + (sum(recent_rewards) / len(recent_rewards)) * weight_factor
-        
-        return base_score
+        with self.writer.lock:
+            row = self.rows.get(action)
+            if row is None or self.counts[row] == 0:
+                return 0  # Default score if no data is available
+            return float(self._score_rows(np.array([row]), weighted)[0])
+    
+    def top_actions(self, k=5):
+        """
+        Returns the k best (action, score) pairs from the incrementally maintained heap.
+        Ties go to the action seen first, as with max() over the table.
+        """
+        with self.writer.lock:
+            if self.decay_mode == "time":
+                scores = self._score_rows(np.arange(len(self.actions)))
+                best = np.argsort(-scores, kind="stable")[:k]
+                return [(self.actions[row], float(scores[row])) for row in best]
+            
+            best, seen = [], set()
+            while self.score_heap and len(best) < k:
+                entry = heapq.heappop(self.score_heap)
+                score, row = -entry[0], entry[1]
+                if row in seen or score != self.scores[row]:
+                    continue  # Stale or duplicate entry
+                seen.add(row)
+                best.append(entry)
+            for entry in best:
+                heapq.heappush(self.score_heap, entry)
+            return [(self.actions[row], float(-score)) for score, row in best]
     
     def suggest_best_action(self):
         """
         Suggests the best action based on previous feedback, factoring in recent feedback weight.
         """
-        if not self.learning_data:
+        best = self.top_actions(1)
+        if not best:
             return "No data available yet."
         
-        best_action = max(self.learning_data, key=lambda action: self.get_action_score(action))
-        best_score = self.get_action_score(best_action)
+        best_action, best_score = best[0]
         
         if best_score < self.min_confidence:
             return "No confident suggestion available, user input needed."
@@ -76,31 +320,54 @@ class ReinforcementLearning:
         """
         Removes actions that have a consistently low score.
         """
-        self.learning_data = {action: data for action, data in self.learning_data.items() 
-                              if data["reward_sum"] >= threshold}
-        self.save_learning_data()
+        with self.writer.lock:
+            keep = np.flatnonzero(self._effective_sums(np.arange(len(self.actions))) >= threshold)
+            actions = [self.actions[row] for row in keep]
+            histories = [self.histories[row] for row in keep]
+            arrays = {name: getattr(self, name)[keep] for name in ("counts", "reward_sums")}
+            kept = set(actions)
+            recent = [(action, reward) for action, reward in self.recent_actions if action in kept]
+            
+            self._reset_table(max(64, len(actions)))
+            for action, history in zip(actions, histories):
+                self.histories[self._row(action)] = history
+            self.counts[:len(actions)] = arrays["counts"]
+            self.reward_sums[:len(actions)] = arrays["reward_sums"]
+            self.recent_actions.clear()
+            for action, reward in recent:
+                self._record_recent(action, reward)
+            self._rescore()
+            self.writer.mark_dirty()
     
     def get_action_history(self, action):
         """
         Returns detailed history of an action's past occurrences.
         """
-        if action in self.learning_data and "history" in self.learning_data[action]:
-            return self.learning_data[action]["history"]
+        with self.writer.lock:
+            row = self.rows.get(action)
+            if row is not None:
+                return list(self.histories[row])
         return ["No recorded history for this action."]
 
 if __name__ == "__main__":
     rl = ReinforcementLearning()
-    
+
     # Example user feedback with detailed tracking
     rl.provide_feedback("Play Music", 1, "User played 'Bohemian Rhapsody'")
     rl.provide_feedback("Stop Music", -1, "User stopped music after 10 seconds")
     rl.provide_feedback("Search Weather", 2, "User searched for today's weather in New York")
     rl.provide_feedback("Play Music", 3, "User played 'Stairway to Heaven'")
-    
+
     print("Score for 'Play Music':", rl.get_action_score("Play Music"))
     print("Score for 'Stop Music':", rl.get_action_score("Stop Music"))
     print("Best Suggested Action:", rl.suggest_best_action())
-    print("Action History for 'Play Music':", rl.get_action_history("Play Music"))
+    print("Top 2 Actions:", rl.top_actions(2))
     
+    # Replaying a burst of logged feedback in one batch
+    rl.provide_feedback_batch([("Play Music", 1, "Replayed"), ("Search Weather", 2), ("Play Music", -1)] * 100)
+    print("Top 2 Actions after replay:", rl.top_actions(2))
+    print("Action History for 'Play Music':", rl.get_action_history("Play Music"))
+
     # Remove actions with very low relevance
-    rl.remove_low_relevance_actions()
\ No newline at end of file
+    rl.remove_low_relevance_actions()
+    rl.flush()
\ No newline at end of file
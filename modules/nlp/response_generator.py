@@ -2,9 +2,8 @@ import re
 import random
 import json
 import os
-from reinforcement_learning import ReinforcementLearning
-from memory import MemoryModule
-from intent_recognizer import IntentRecognizer
+import components
+import latency
 
 class ResponseGenerator:
     def __init__(self):
@@ -27,23 +26,44 @@ class ResponseGenerator:
             "time_check": ["Checking the current time.", "The time is now displayed on your screen.", "Here’s the current time."],
             "date_check": ["Today's date is displayed.", "Checking the current date.", "Here’s today’s date for you."]
         }
-        self.memory = MemoryModule()
-        self.reinforcement = ReinforcementLearning()
-        self.intent_recognizer = IntentRecognizer()
     
-    def generate_response(self, text, user_name="User"):
-        intent = self.intent_recognizer.recognize_intent(text)
+    # Collaborators come from the shared registry and are only loaded on first use
+    @property
+    def memory(self):
+        return components.get_memory()
+    
+    @property
+    def sessions(self):
+        return components.get_sessions()
+    
+    @property
+    def reinforcement(self):
+        return components.get_reinforcement()
+    
+    @property
+    def intent_recognizer(self):
+        return components.get_intent_recognizer()
+    
+    @latency.timed("response.generate")
+    def generate_response(self, text, user_name="User", session_id=None):
+        """
+        Safe to call from many threads. With a session_id the exchange is recorded in that
+        user's own history instead of the shared single-user memory.
+        """
+        with latency.span("intent.recognize"):
+            intent = self.intent_recognizer.best_intent(text)
         
         if intent in self.responses:
             response = random.choice(self.responses[intent]).format(name=user_name)
             self.reinforcement.provide_feedback(intent, 1, f"Generated response: {response}")
-            self.memory.add_to_history(text, response)
+            memory = self.memory if session_id is None else self.sessions.get(session_id)
+            memory.add_to_history(text, response)
             return response
         else:
             return "I'm not sure how to respond to that. Would you like me to learn this?"
 
 if __name__ == "__main__":
-    responder = ResponseGenerator()
+    responder = components.get_response_generator()
     
     test_inputs = [
         "Hey there!", "Can you play some music?", "Stop the movie", "Launch the game", 
@@ -54,4 +74,22 @@ if __name__ == "__main__":
     
     for text in test_inputs:
         response = responder.generate_response(text, user_name="Alex")
-        print(f"Input: {text} -> Response: {response}")
\ No newline at end of file
+        print(f"Input: {text} -> Response: {response}")
+    
+    # Throughput benchmark: many users talking at once, each with their own session
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def converse(session_id):
+        for text in test_inputs:
+            responder.generate_response(text, user_name=f"User {session_id}", session_id=session_id)
+    
+    for concurrent_sessions in (1, 4, 16, 64):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrent_sessions) as pool:
+            list(pool.map(converse, range(concurrent_sessions * 4)))
+        elapsed = time.perf_counter() - start
+        total = concurrent_sessions * 4 * len(test_inputs)
+        print(f"{concurrent_sessions:>3} concurrent sessions: {total / elapsed:,.0f} responses/s")
+    responder.sessions.flush()
+    print("Session stats:", responder.sessions.stats())
\ No newline at end of file
@@ -1,28 +1,126 @@
-import nltk
-from nltk.sentiment import SentimentIntensityAnalyzer
-from memory import MemoryModule
-nltk.download('vader_lexicon')
+import json
+import os
+import nltk_resources
+from persistence import WriteBehind, atomic_write_json
+
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+class SentimentHistory:
+    def __init__(self, history_file="sentiment_history.json", capacity=1000, ewma_alpha=0.3,
+                 flush_every=20, flush_interval=5.0):
+        """
+        Fixed-size ring of compound scores. Each slot also holds running totals (score sum,
+        positive and negative counts) up to that record, so any window of the last n <= capacity
+        records is a difference of two slots. Kept in its own file, apart from conversation memory.
+        """
+        self.history_file = history_file
+        self.capacity = capacity
+        self.ewma_alpha = ewma_alpha
+        # One spare slot holds the totals just before the oldest retained record
+        self.scores = [0.0] * (capacity + 1)
+        self.score_totals = [0.0] * (capacity + 1)
+        self.positive_totals = [0] * (capacity + 1)
+        self.negative_totals = [0] * (capacity + 1)
+        self.recorded = 0  # Records ever added; slot of record i is i % (capacity + 1)
+        self.ewma = None
+        self.writer = WriteBehind(self.snapshot, self.write_history, flush_every, flush_interval)
+        data = self.load_history()
+        for score in data.get("scores", [])[-capacity:]:
+            self.add(score, persist=False)
+        self.ewma = data.get("ewma", self.ewma)  # The saved EWMA also covers records older than capacity
+
+    def load_history(self):
+        if os.path.exists(self.history_file):
+            with open(self.history_file, "r") as f:
+                return json.load(f)
+        return {}
+
+    def snapshot(self):
+        return {"scores": self.last(self.capacity), "ewma": self.ewma}
+
+    def write_history(self, data):
+        atomic_write_json(self.history_file, data)
+
+    def save_history(self):
+        with self.writer.lock:
+            data = self.snapshot()
+        self.write_history(data)
+
+    def flush(self):
+        self.writer.flush()
+
+    def add(self, score, persist=True):
+        with self.writer.lock:
+            self._append(score)
+            if persist:
+                self.writer.mark_dirty()
+
+    def _append(self, score):
+        slot = self.recorded % (self.capacity + 1)
+        previous = (self.recorded - 1) % (self.capacity + 1)
+        first = self.recorded == 0
+        self.scores[slot] = score
+        self.score_totals[slot] = (0.0 if first else self.score_totals[previous]) + score
+        self.positive_totals[slot] = (0 if first else self.positive_totals[previous]) + (score >= POSITIVE_THRESHOLD)
+        self.negative_totals[slot] = (0 if first else self.negative_totals[previous]) + (score <= NEGATIVE_THRESHOLD)
+        self.recorded += 1
+        self.ewma = score if self.ewma is None else self.ewma_alpha * score + (1 - self.ewma_alpha) * self.ewma
+
+    def __len__(self):
+        return min(self.recorded, self.capacity)
+
+    def _totals_before(self, n):
+        """Running totals just before the n-th most recent record (zeros if nothing precedes it)."""
+        index = self.recorded - n - 1
+        if index < 0:
+            return 0.0, 0, 0
+        slot = index % (self.capacity + 1)
+        return self.score_totals[slot], self.positive_totals[slot], self.negative_totals[slot]
+
+    def window(self, last_n):
+        """Returns {count, mean, positive, negative} over the last last_n records in O(1)."""
+        n = min(last_n, len(self))
+        if not n:
+            return {"count": 0, "mean": 0.0, "positive": 0, "negative": 0}
+        latest = (self.recorded - 1) % (self.capacity + 1)
+        score_before, positive_before, negative_before = self._totals_before(n)
+        return {
+            "count": n,
+            "mean": (self.score_totals[latest] - score_before) / n,
+            "positive": self.positive_totals[latest] - positive_before,
+            "negative": self.negative_totals[latest] - negative_before
+        }
+
+    def last(self, n):
+        """The last n compound scores, oldest first."""
+        n = min(n, len(self))
+        return [self.scores[i % (self.capacity + 1)] for i in range(self.recorded - n, self.recorded)]
 
 class SentimentAnalyzer:
-    def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
-        self.memory = MemoryModule()  # Tracks sentiment over time
+    def __init__(self, history_file="sentiment_history.json", capacity=1000):
+        self.history = SentimentHistory(history_file, capacity)  # Tracks sentiment over time
+
+    @property
+    def analyzer(self):
+        """VADER analyzer, loaded on first use and shared for the process lifetime."""
+        return nltk_resources.get_sentiment_analyzer()
     
     def analyze_sentiment(self, text):
         """
         Analyzes sentiment and classifies it as positive, neutral, or negative.
-        Also updates sentiment history in memory.
+        Also updates the sentiment history.
         """
         scores = self.analyzer.polarity_scores(text)
         sentiment = "neutral"
         
-        if scores['compound'] >= 0.05:
+        if scores['compound'] >= POSITIVE_THRESHOLD:
             sentiment = "positive"
-        elif scores['compound'] <= -0.05:
+        elif scores['compound'] <= NEGATIVE_THRESHOLD:
             sentiment = "negative"
         
         # Store sentiment history
-        self.memory.add_to_history("sentiment", {"text": text, "sentiment": sentiment, "score": scores['compound']})
+        self.history.add(scores['compound'])
         
         return {
             "text": text,
@@ -32,15 +130,15 @@ class SentimentAnalyzer:
     
     def get_sentiment_trend(self, last_n=5):
         """
-        Retrieves the sentiment trend based on the last N interactions.
+        Retrieves the sentiment trend based on the last N interactions, in constant time.
         """
-        history = self.memory.get_history()[-last_n:]
+        window = self.history.window(last_n)
         
-        if not history:
+        if not window["count"]:
             return "No sentiment history available."
         
-        pos_count = sum(1 for entry in history if entry["ai"] == "positive")
-        neg_count = sum(1 for entry in history if entry["ai"] == "negative")
+        pos_count = window["positive"]
+        neg_count = window["negative"]
         
         if pos_count > neg_count:
             return "User's sentiment is trending positive."
@@ -48,6 +146,10 @@ class SentimentAnalyzer:
             return "User's sentiment is trending negative."
         else:
             return "User's sentiment appears neutral."
+    
+    def get_sentiment_stats(self, last_n=5):
+        """Window counts and mean score for the last N interactions, plus the long-run EWMA."""
+        return dict(self.history.window(last_n), ewma=self.history.ewma)
 
 if __name__ == "__main__":
     analyzer = SentimentAnalyzer()
@@ -65,4 +167,6 @@ if __name__ == "__main__":
         print(f"Input: {result['text']} -> Sentiment: {result['sentiment']} (Score: {result['compound_score']})")
     
     # Check sentiment trend
-    print(analyzer.get_sentiment_trend())
\ No newline at end of file
+    print(analyzer.get_sentiment_trend())
+    print("Last 3:", analyzer.get_sentiment_stats(3))
+    analyzer.history.flush()
\ No newline at end of file
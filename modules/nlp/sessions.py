@@ -0,0 +1,92 @@
+# Per-user conversation memory with a bounded set of active sessions
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from functools import partial
+from memory import MemoryModule
+
+class SessionManager:
+    def __init__(self, session_dir="sessions", max_active=64, history_limit=10):
+        """
+        Keeps a MemoryModule per session id. At most max_active sessions stay in memory; the
+        least recently used one is flushed to its own file in session_dir and dropped, and is
+        loaded back from that file the next time its user speaks. Loads and spills run
+        outside the manager's lock; only requests for the session being moved wait for it.
+        """
+        self.session_dir = session_dir
+        self.max_active = max_active
+        self.history_limit = history_limit
+        self.active = OrderedDict()
+        self.moving = {}  # session id -> Event set once its load or spill is done
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+        self.spills = 0
+        os.makedirs(session_dir, exist_ok=True)
+
+    def session_file(self, session_id):
+        # Hashing keeps arbitrary ids (emails, HTTP tokens) safe to use as file names
+        digest = hashlib.sha1(str(session_id).encode("utf-8")).hexdigest()
+        return os.path.join(self.session_dir, f"{digest}.json")
+
+    def get(self, session_id):
+        """Returns the session's MemoryModule, loading it from disk if it is not active."""
+        while True:
+            with self.lock:
+                memory = self.active.get(session_id)
+                if memory is not None:
+                    self.active.move_to_end(session_id)
+                    self.hits += 1
+                    return memory
+                moving = self.moving.get(session_id)
+                if moving is None:
+                    loaded = self.moving[session_id] = threading.Event()
+                    break
+            moving.wait()  # Another thread is loading or spilling this session
+
+        try:
+            memory = MemoryModule(self.session_file(session_id), self.history_limit)
+        except BaseException:
+            with self.lock:
+                del self.moving[session_id]
+            loaded.set()
+            raise
+        with self.lock:
+            del self.moving[session_id]
+            self.active[session_id] = memory
+            self.loads += 1
+            idle = []
+            while len(self.active) > self.max_active:
+                idle_id, idle_memory = self.active.popitem(last=False)
+                self.moving[idle_id] = threading.Event()  # Reloads wait until the spill is on disk
+                idle.append((idle_id, idle_memory))
+        loaded.set()
+
+        for idle_id, idle_memory in idle:
+            try:
+                # Writes through a stale reference go to the session's next incarnation
+                idle_memory.close(reopen=partial(self.get, idle_id))
+            finally:
+                with self.lock:
+                    self.spills += 1
+                    self.moving.pop(idle_id).set()
+        return memory
+
+    def flush(self):
+        """Writes every active session to disk."""
+        with self.lock:
+            sessions = list(self.active.values())
+        for memory in sessions:
+            memory.flush()
+
+    def stats(self):
+        return {"active": len(self.active), "hits": self.hits, "loads": self.loads, "spills": self.spills}
+
+if __name__ == "__main__":
+    manager = SessionManager("sessions_demo", max_active=2)
+    for user in ["alice", "bob", "carol", "alice"]:
+        manager.get(user).add_to_history(f"Hi, I'm {user}", f"Hello {user}!")
+    print("alice's history (reloaded after being spilled):", manager.get("alice").get_history())
+    print("Session stats:", manager.stats())
+    manager.flush()
\ No newline at end of file
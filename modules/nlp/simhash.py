@@ -0,0 +1,89 @@
+# SimHash fingerprints and a banded index for finding near-duplicate texts
+import hashlib
+from collections import Counter, defaultdict
+import numpy as np
+from knowledge_index import tokenize
+
+FINGERPRINT_BITS = 64
+_BIT_POSITIONS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+
+def simhash(text, shingle_size=2):
+    """
+    64-bit SimHash of text over word shingles, weighted by how often each occurs. Texts that
+    share most of their shingles get fingerprints a small Hamming distance apart.
+    """
+    tokens = tokenize(text)
+    if len(tokens) < shingle_size:
+        features = Counter(tokens)
+    else:
+        features = Counter(" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1))
+    if not features:
+        return 0
+    hashes = np.array([_feature_hash(feature) for feature in features], dtype=np.uint64)
+    weights = np.array(list(features.values()), dtype=np.int64)
+    bits = ((hashes[:, None] >> _BIT_POSITIONS) & np.uint64(1)).astype(np.int64)
+    votes = weights @ (2 * bits - 1)
+    return int(np.bitwise_or.reduce((votes > 0).astype(np.uint64) << _BIT_POSITIONS))
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+class FingerprintIndex:
+    def __init__(self, max_distance=10):
+        """
+        Finds stored fingerprints within max_distance bits of a query. Fingerprints are split
+        into max_distance + 1 bands; any two within max_distance differ in at most
+        max_distance bands, so they share at least one band exactly and only items sharing
+        a band are compared. Items can be added under a group (such as a category), and a
+        query only compares items in its own group.
+        """
+        self.max_distance = max_distance
+        bands = max_distance + 1
+        edges = [round(i * FINGERPRINT_BITS / bands) for i in range(bands + 1)]
+        self.bands = [(start, (1 << (end - start)) - 1) for start, end in zip(edges, edges[1:])]
+        self.tables = [defaultdict(set) for _ in self.bands]
+        self.fingerprints = {}  # item -> (group, fingerprint)
+
+    def _keys(self, fingerprint):
+        return [(fingerprint >> shift) & mask for shift, mask in self.bands]
+
+    def add(self, item, fingerprint, group=None):
+        self.fingerprints[item] = (group, fingerprint)
+        for table, key in zip(self.tables, self._keys(fingerprint)):
+            table[group, key].add(item)
+
+    def remove(self, item):
+        group, fingerprint = self.fingerprints.pop(item, (None, None))
+        if fingerprint is None:
+            return
+        for table, key in zip(self.tables, self._keys(fingerprint)):
+            table[group, key].discard(item)
+            if not table[group, key]:
+                del table[group, key]
+
+    def near(self, fingerprint, group=None):
+        """Returns [(item, distance)] for items stored under group within max_distance, closest first."""
+        candidates = set()
+        for table, key in zip(self.tables, self._keys(fingerprint)):
+            candidates |= table.get((group, key), set())
+        matches = [(item, hamming_distance(fingerprint, self.fingerprints[item][1])) for item in candidates]
+        return sorted((match for match in matches if match[1] <= self.max_distance), key=lambda match: match[1])
+
+    def __len__(self):
+        return len(self.fingerprints)
+
+if __name__ == "__main__":
+    original = ("Python is a high-level, general-purpose programming language. Its design philosophy "
+                "emphasizes code readability with the use of significant indentation.")
+    edited = original.replace("general-purpose", "general purpose") + " Learn more."
+    unrelated = "Gravity is a fundamental interaction which causes mutual attraction between all things with mass."
+
+    index = FingerprintIndex()
+    index.add("original", simhash(original))
+    index.add("unrelated", simhash(unrelated))
+    print("Distance original/edited:", hamming_distance(simhash(original), simhash(edited)))
+    print("Distance original/unrelated:", hamming_distance(simhash(original), simhash(unrelated)))
+    print("Near-duplicates of the edited text:", index.near(simhash(edited)))
\ No newline at end of file
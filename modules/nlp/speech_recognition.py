@@ -1,15 +1,21 @@
 import speech_recognition as sr
 import time
-from intent_recognizer import IntentRecognizer
-from response_generator import ResponseGenerator
+import components
+import latency
 
 class SpeechRecognizer:
     def __init__(self, recognition_engine="google"):
         self.recognizer = sr.Recognizer()
-        self.intent_recognizer = IntentRecognizer()
-        self.response_generator = ResponseGenerator()
         self.recognition_engine = recognition_engine  # Default to Google Speech Recognition
     
+    @property
+    def intent_recognizer(self):
+        return components.get_intent_recognizer()
+    
+    @property
+    def response_generator(self):
+        return components.get_response_generator()
+    
     def recognize_speech(self):
         """
         Captures audio from the microphone and converts it to text.
@@ -19,13 +25,14 @@ class SpeechRecognizer:
             print("Listening...")
             self.recognizer.adjust_for_ambient_noise(source, duration=1)
             try:
-                audio = self.recognizer.listen(source, timeout=5)
-                text = self.process_audio(audio)
+                with latency.span("speech.listen"):
+                    audio = self.recognizer.listen(source, timeout=5)
+                with latency.span("speech.transcribe"):
+                    text = self.process_audio(audio)
                 
                 if text:
                     print(f"Recognized: {text}")
-                    intent = self.intent_recognizer.recognize_intent(text)
-                    response = self.response_generator.generate_response(intent)
+                    response = self.response_generator.generate_response(text)
                     print(f"Response: {response}")
                     return response
                 else:
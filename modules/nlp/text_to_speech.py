@@ -1,4 +1,5 @@
 import pyttsx3
+import latency
 
 class TextToSpeech:
     def __init__(self, rate=150, volume=1.0, voice=None):
@@ -29,6 +30,7 @@ class TextToSpeech:
         # Default to first available voice
         self.engine.setProperty('voice', voices[0].id)
     
+    @latency.timed("tts.speak")
     def speak(self, text):
         """Converts text to speech and speaks it aloud."""
         self.engine.say(text)
@@ -1,39 +1,91 @@
 import re
-import nltk
 import string
-from nltk.tokenize import TreebankWordTokenizer
-from nltk.corpus import stopwords
-from nltk.stem import PorterStemmer, WordNetLemmatizer
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+import nltk_resources
 
-# Ensure required nltk resources are downloaded
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('wordnet')
-nltk.download('omw-1.4')
+PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+WORD_CACHE_SIZE = 200000  # Distinct words remembered by the stem/lemma caches
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def stem_word(word):
+    """Memoized Porter stem; most tokens in a corpus repeat."""
+    return nltk_resources.get_stemmer().stem(word)
+
+@lru_cache(maxsize=WORD_CACHE_SIZE)
+def lemmatize_word(word):
+    """Memoized WordNet lemma; most tokens in a corpus repeat."""
+    return nltk_resources.get_lemmatizer().lemmatize(word)
+
+def _preprocess_chunk(texts, use_stemming, use_lemmatization):
+    """Worker entry point for preprocess_many's process pool."""
+    tokenizer = Tokenizer()
+    return [tokenizer.preprocess(text, use_stemming, use_lemmatization) for text in texts]
 
 class Tokenizer:
-    def __init__(self):
-        self.stop_words = set(stopwords.words('english'))
-        self.stemmer = PorterStemmer()
-        self.lemmatizer = WordNetLemmatizer()
-        self.tokenizer = TreebankWordTokenizer()
+    # NLTK resources are resolved on first use and shared across instances, so importing
+    # and constructing a Tokenizer never touches the network or loads corpora
+    @property
+    def stop_words(self):
+        return nltk_resources.get_stopwords('english')
+
+    @property
+    def stemmer(self):
+        return nltk_resources.get_stemmer()
+
+    @property
+    def lemmatizer(self):
+        return nltk_resources.get_lemmatizer()
+
+    @property
+    def tokenizer(self):
+        return nltk_resources.get_word_tokenizer()
 
     def preprocess(self, text, use_stemming=False, use_lemmatization=True):
         """
         Preprocesses the input text by converting it to lowercase, removing punctuation,
         tokenizing, filtering out stopwords, and applying stemming or lemmatization.
         """
-        text = text.lower().translate(str.maketrans('', '', string.punctuation))
+        text = text.lower().translate(PUNCTUATION_TABLE)
         tokens = self.tokenizer.tokenize(text)
-        filtered_tokens = [word for word in tokens if word not in self.stop_words]
+        stop_words = self.stop_words
+        filtered_tokens = [word for word in tokens if word not in stop_words]
         
         if use_stemming:
-            filtered_tokens = [self.stemmer.stem(word) for word in filtered_tokens]
+            filtered_tokens = [stem_word(word) for word in filtered_tokens]
         elif use_lemmatization:
-            filtered_tokens = [self.lemmatizer.lemmatize(word) for word in filtered_tokens]
+            filtered_tokens = [lemmatize_word(word) for word in filtered_tokens]
         
         return filtered_tokens
 
+    def preprocess_many(self, texts, use_stemming=False, use_lemmatization=True, processes=None, chunk_size=500, max_pending=None):
+        """
+        Streams preprocess() over any iterable of texts, yielding token lists in input order.
+        With processes > 1 the input is cut into chunks of chunk_size and sharded across a
+        process pool. At most max_pending chunks (default 2 per process) are in flight, so
+        memory stays bounded no matter how large the input is.
+        """
+        texts = iter(texts)
+        if not processes or processes <= 1:
+            for text in texts:
+                yield self.preprocess(text, use_stemming, use_lemmatization)
+            return
+
+        max_pending = max_pending or processes * 2
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            pending = deque()
+            while True:
+                while len(pending) < max_pending:
+                    chunk = list(islice(texts, chunk_size))
+                    if not chunk:
+                        break
+                    pending.append(pool.submit(_preprocess_chunk, chunk, use_stemming, use_lemmatization))
+                if not pending:
+                    return
+                yield from pending.popleft().result()
+
 if __name__ == "__main__":
     tokenizer = Tokenizer()
     
@@ -46,4 +98,10 @@ if __name__ == "__main__":
     
     for sentence in test_sentences:
         tokens = tokenizer.preprocess(sentence)
-        print(f"Input: {sentence} -> Tokens: {tokens}")
\ No newline at end of file
+        print(f"Input: {sentence} -> Tokens: {tokens}")
+
+    # Streaming a larger corpus across two worker processes
+    corpus = (sentence for _ in range(1000) for sentence in test_sentences)
+    token_count = sum(len(tokens) for tokens in tokenizer.preprocess_many(corpus, processes=2))
+    print(f"Preprocessed {len(test_sentences) * 1000} sentences into {token_count} tokens.")
+    print("Lemma cache:", lemmatize_word.cache_info())
\ No newline at end of file
@@ -1,24 +1,57 @@
-import requests
 from bs4 import BeautifulSoup
+import os
 import re
-from knowledge_base import KnowledgeBase
-from intent_recognizer import IntentRecognizer
+from functools import partial
+from urllib.parse import quote_plus, urljoin
+import components
+from crawl_scheduler import INTERACTIVE
+from fetch_engine import FetchEngine
+from html_extract import extract_paragraphs, extract_result_links
+from http_cache import HTTPCache
+
+RESULT_PREFIX = "Information retrieved and stored: "  # Marks a successful fetch_information result
+FAILED_PAGE = "Failed to retrieve the webpage."
+SEARCH_FAILED = "Failed to retrieve search results."  # The search page could not be fetched (timeout, offline, 429...)
+NO_RESULTS = "No results found."  # The search ran and found nothing
+# {query} is replaced by the URL-encoded query; point it at a local stand-in server for testing
+SEARCH_URL = os.getenv("AVSAIS_SEARCH_URL", "https://www.google.com/search?q={query}")
+SUMMARY_CHARS = 500  # Characters of scraped content kept in the knowledge base
+WEB_CATEGORY = "WebScraped"  # Knowledge base category for scraped content
 
 class WebScraper:
-    def __init__(self):
-        self.knowledge_base = KnowledgeBase()
-        self.intent_recognizer = IntentRecognizer()
+    def __init__(self, search_url=SEARCH_URL, engine=None, extraction="stream", priority=INTERACTIVE):
+        """
+        extraction="stream" pulls only headline links and paragraph text out of pages with an
+        event parser; "soup" builds the full BeautifulSoup tree as before. priority is the
+        crawl lane for this scraper's requests (use BACKGROUND for enrichment jobs).
+        """
+        self.search_url = search_url
+        self.extraction = extraction
+        self.priority = priority
+        # Re-scraped pages come from disk; network requests are rate limited per host
+        self.engine = engine or FetchEngine(cache=HTTPCache(), crawl_options={})
+    
+    @property
+    def knowledge_base(self):
+        return components.get_knowledge_base()
+    
+    @property
+    def intent_recognizer(self):
+        return components.get_intent_recognizer()
     
     def search_web(self, query):
         """
         Performs a web search and extracts useful content.
         """
-        search_url = f"https://www.google.com/search?q={query}"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(search_url, headers=headers)
+        search_url = self.search_url.format(query=quote_plus(query))
+        response = self.engine.get(search_url, self.priority)
+        
+        if response is None or response.status_code != 200:
+            return SEARCH_FAILED
         
-        if response.status_code != 200:
-            return "Failed to retrieve search results."
+        if self.extraction == "stream":
+            links = extract_result_links(response.text, response.url, limit=5)
+            return links if links else NO_RESULTS
         
         soup = BeautifulSoup(response.text, "html.parser")
         search_results = soup.find_all("h3")  # Extracts headlines from search results
@@ -27,19 +60,22 @@ class WebScraper:
         for result in search_results[:5]:  # Limit to first 5 results
             parent = result.find_parent("a")
             if parent and parent.get("href"):
-                links.append(parent.get("href"))
+                links.append(urljoin(response.url, parent.get("href")))
         
-        return links if links else "No results found."
+        return links if links else NO_RESULTS
     
-    def scrape_content(self, url):
+    def scrape_content(self, url, max_chars=None):
         """
-        Extracts meaningful content from a web page.
+        Extracts meaningful content from a web page. With max_chars, streaming extraction
+        stops once at least that much text has been collected.
         """
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers)
+        response = self.engine.get(url, self.priority)
+        
+        if response is None or response.status_code != 200:
+            return FAILED_PAGE
         
-        if response.status_code != 200:
-            return "Failed to retrieve the webpage."
+        if self.extraction == "stream":
+            return extract_paragraphs(response.text, max_chars)
         
         soup = BeautifulSoup(response.text, "html.parser")
         paragraphs = soup.find_all("p")
@@ -57,16 +93,18 @@ class WebScraper:
         if isinstance(search_results, str):
             return search_results  # Return error message if search failed
         
-        for url in search_results:
-            content = self.scrape_content(url)
-            if content:
-                self.knowledge_base.add_fact("WebScraped", query, content[:500])  # Store only first 500 chars for summary
-                return f"Information retrieved and stored: {content[:200]}..."
+        # Candidate pages are fetched concurrently; the first one with content wins
+        content = self.engine.first_result(search_results, partial(self.scrape_content, max_chars=SUMMARY_CHARS),
+                                           usable=lambda text: bool(text) and text != FAILED_PAGE)
+        if content:
+            # Store only first 500 chars for summary; a page overlapping an earlier one replaces it
+            self.knowledge_base.add_fact(WEB_CATEGORY, query, content[:SUMMARY_CHARS], on_duplicate="replace")
+            return f"{RESULT_PREFIX}{content[:200]}..."
         
         return "No relevant information could be extracted."
     
 if __name__ == "__main__":
-    scraper = WebScraper()
+    scraper = components.get_web_scraper()
     
     test_queries = [
         "Latest AI advancements",
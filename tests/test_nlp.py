@@ -1 +1,626 @@
 # Test NLP components
+import importlib
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+MODULES = os.path.join(os.path.dirname(__file__), "..", "modules")
+sys.path.insert(0, os.path.join(MODULES, "nlp"))
+
+import components
+import fuzzy_index
+import nltk_resources
+from crawl_scheduler import BACKGROUND, INTERACTIVE, CrawlScheduler
+from fetch_engine import FetchEngine
+from fuzzy_index import FuzzyIndex
+from fuzzywuzzy import fuzz, utils
+from http_cache import HTTPCache
+from intent_recognizer import PARTIAL_MATCH_CAP, IntentRecognizer, normalize_utterance
+from knowledge_base import KnowledgeBase
+from knowledge_index import KnowledgeIndex
+from knowledge_store import JSONKnowledgeStore, SQLiteKnowledgeStore
+from memory import MemoryModule
+from persistence import atomic_write_json
+from query_cache import QueryCache
+from reinforcement_learning import ReinforcementLearning
+from sentiment_analysis import SentimentAnalyzer, SentimentHistory
+from sessions import SessionManager
+from simhash import FingerprintIndex, hamming_distance, simhash
+from web_scraper import NO_RESULTS, RESULT_PREFIX, SEARCH_FAILED, WEB_CATEGORY
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Runs each test in its own directory with fresh shared components, so default data files never land in the repo."""
+    monkeypatch.chdir(tmp_path)
+    components.reset_components()
+
+PAGE = b"<html><body>" + b"<p>Cached paragraph.</p>" * 200 + b"</body></html>"
+
+class StandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the sites the scraper talks to."""
+
+    def do_GET(self):
+        if self.path == "/slow":
+            time.sleep(2)
+        if self.path == "/cached" and self.headers.get("If-None-Match") == '"v1"':
+            self.server.revalidations += 1
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.end_headers()
+            return
+        if self.path == "/broken" or (self.path == "/flaky" and next(self.server.flaky_calls) < 2):
+            status = 503 if self.path == "/flaky" else 500
+        else:
+            status = 200
+        body = PAGE if self.path == "/cached" else f"<html><body><p>Content of {self.path}</p></body></html>".encode()
+        self.send_response(status)
+        if self.path == "/cached":
+            self.send_header("ETag", '"v1"')
+            self.send_header("Cache-Control", "max-age=0")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandIn)
+    server.revalidations = 0
+    server.flaky_calls = itertools.count()
+    server.base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_first_usable_result_wins(server):
+    engine = FetchEngine(timeout=(1, 3))
+
+    def page_text(url):
+        response = engine.get(url)
+        return response.text if response is not None and response.status_code == 200 else None
+
+    start = time.monotonic()
+    result = engine.first_result([f"{server.base}/slow", f"{server.base}/broken", f"{server.base}/fast"], page_text)
+    assert "Content of /fast" in result
+    assert time.monotonic() - start < 1.5  # Did not wait for the slow page
+    engine.close()
+
+def test_timeout_returns_none(server):
+    engine = FetchEngine(timeout=(1, 0.3))
+    assert engine.get(f"{server.base}/slow") is None
+    engine.close()
+
+@pytest.mark.parametrize("text, intents", [
+    ("Hey there, what time is it?", ["greeting", "time_check"]),
+    ("Launch the game", ["game_launch"]),
+    ("Play music and set a reminder", ["music_play"]),
+    ("Tell me about the current time", ["query", "time_check"]),
+    ("Goodbye!", ["farewell"]),  # "bye" does not match inside "goodbye"
+    ("launch gam", ["game_launch"])  # Fuzzy fallback
+])
+def test_recognize_intent(text, intents):
+    assert IntentRecognizer().recognize_intent(text) == intents
+
+@pytest.mark.parametrize("text", [
+    "Hey there, what time is it?", "Please launch game", "Play music and set a reminder",
+    "Tell me about the current time", "Goodbye!", "stop movie, then stop music", "What's today's date?"
+])
+def test_batch_scoring_agrees_with_recognize_intent(text):
+    recognizer = IntentRecognizer()
+    batch = recognizer.recognize_intents([text, text.upper()], chunk_size=1)
+    expected = [(intent, 1.0) for intent in dict.fromkeys(recognizer.recognize_intent(text))]
+    assert batch == [expected, expected]
+
+def test_partial_trigram_match_is_not_exact():
+    recognizer = IntentRecognizer()
+    scores = dict(zip(recognizer._scored_intents, recognizer.score_intents(["chi high"])[0]))
+    assert scores["greeting"] == pytest.approx(PARTIAL_MATCH_CAP)  # " hi" and "hi " appear, but not the word "hi"
+    assert recognizer.recognize_intent("chi high") == ["unknown"]
+
+@pytest.mark.parametrize("text, intent", [
+    ("Can you play some music?", "music_play"),
+    ("zzzz qqqq", "unknown")
+])
+def test_best_intent(text, intent):
+    assert IntentRecognizer().best_intent(text) == intent
+
+def test_trained_classifier_ranks_top_k(tmp_path):
+    recognizer = IntentRecognizer()
+    recognizer.train_classifier([("could you put on some tunes", "music_play")], model_file=str(tmp_path / "intent_model.bin"))
+    ranked = recognizer.rank_intents("put on some tunes", top_k=3)
+    assert ranked[0][0] == "music_play"
+    assert len(ranked) == 3 and ranked[0][1] >= ranked[1][1] >= ranked[2][1]
+    assert IntentRecognizer(model_file=str(tmp_path / "intent_model.bin")).best_intent("put on some tunes") == "music_play"
+
+def test_keyword_matching_agrees_with_word_boundary_regex():
+    rng = random.Random(1)
+    vocabulary = [f"w{i}" for i in range(30)] + ["a", "b", "café", "s"]
+    recognizer = IntentRecognizer()
+    recognizer.intents = {f"intent{i}": [" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3))) for _ in range(3)]
+                          for i in range(100)}
+    keywords = set(recognizer._normalized_keywords.values())
+    for _ in range(200):
+        text = normalize_utterance(" ".join(rng.choice(vocabulary + ["’", "—"]) for _ in range(10)))
+        expected = {keyword for keyword in keywords if re.search(rf"\b{re.escape(keyword)}\b", text)}
+        assert recognizer.match_keywords(text) == expected
+
+def test_add_and_remove_intent_recompile_the_matcher():
+    recognizer = IntentRecognizer()
+    recognizer.add_intent("lights_on", ["turn on the lights"])
+    assert recognizer.recognize_intent("Please turn on the lights") == ["lights_on"]
+    recognizer.remove_intent("lights_on")
+    assert "lights_on" not in recognizer.recognize_intent("Please turn on the lights")
+
+def full_scan(phrases, query, score_cutoff):
+    best = None
+    for phrase in phrases:
+        score = fuzz.ratio(utils.full_process(query), utils.full_process(phrase))
+        if score > score_cutoff and (best is None or score > best[1]):
+            best = (phrase, score)
+    return best
+
+@pytest.mark.parametrize("score_cutoff", [60, 75, 90])
+def test_fuzzy_index_agrees_with_full_scan(score_cutoff):
+    rng = random.Random(2)
+    words = ["".join(rng.choice("abcdeilmnorst") for _ in range(rng.randint(2, 6))) for _ in range(60)]
+    phrases = list(dict.fromkeys(" ".join(rng.choice(words) for _ in range(rng.randint(1, 3))) for _ in range(300)))
+    index = FuzzyIndex(phrases)
+    for _ in range(150):
+        query = " ".join(rng.choice(words) for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.5:  # Misspell one character
+            i = rng.randrange(len(query))
+            query = query[:i] + rng.choice("abcdeilmnorst") + query[i + 1:]
+        assert index.extract_one(query, score_cutoff) == full_scan(phrases, query, score_cutoff)
+
+def test_fuzzy_index_scores_only_candidates_on_a_miss():
+    index = FuzzyIndex([f"phrase number {i}" for i in range(1000)] + ["play music"])
+    assert index.candidates("ply musc") == ["play music"]
+    assert index.candidates("zzzz qqqq") == []
+    assert index.best_match("zzzz qqqq") is None
+
+def test_fuzzy_index_remove_keeps_owners_and_order():
+    index = FuzzyIndex()
+    index.add("colour", owner="Personal")
+    index.add("color", owner="Work")
+    assert index.best_match("colr") == ("color", "Work", 89)
+    index.remove("color")
+    assert index.best_match("colr") == ("colour", "Personal", 80)
+    assert len(index) == 1
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    """Counts fuzz.ratio calls made by the fuzzy indexes."""
+    calls = []
+    ratio = fuzzy_index.fuzz.ratio
+    monkeypatch.setattr(fuzzy_index.fuzz, "ratio", lambda a, b: calls.append(b) or ratio(a, b))
+    return calls
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_knowledge_miss_scores_only_candidates(tmp_path, storage, scored):
+    knowledge = KnowledgeBase(str(tmp_path / f"knowledge.{storage}"), storage=storage, on_duplicate="keep")
+    knowledge.web_cache = QueryCache(str(tmp_path / "query_cache.json"))
+    knowledge.search_web = lambda query: f"web:{query}"
+    for i in range(2000):
+        knowledge.add_fact(f"Category {i % 50}", f"Topic {i}", f"Fact number {i}")
+    knowledge.add_fact("Programming", "Python", "A programming language.")
+
+    assert knowledge.search_knowledge("Pythn") == {"Programming": {"Python": ["A programming language."]}}
+    scored.clear()
+    assert knowledge.search_knowledge("zebra crossing") == "web:zebra crossing"
+    assert scored == []  # Neither the categories nor the keys were scanned
+    knowledge.store.close()
+
+def test_memory_recall_uses_key_index(tmp_path, scored):
+    memory = MemoryModule(str(tmp_path / "memory.json"), write_behind=False)
+    for i in range(500):
+        memory.remember("Notes", f"note {i}", i)
+    memory.remember("Personal", "favourite colour", "Blue")
+    assert memory.recall("Personal", "favorite color") == ["Blue"]
+    assert len(scored) < 10
+    assert memory.recall("Personal", "shoe size") == "I don't remember that."
+
+
+def test_learning_model_shares_the_reinforcement_store(monkeypatch):
+    monkeypatch.syspath_prepend(MODULES)
+    packaged = importlib.import_module("nlp.reinforcement_learning")  # Second copy of the module under a package name
+    learning_model = importlib.import_module("database.learning_model")
+
+    model = learning_model.LearningModel()
+    shared = components.get_reinforcement()
+    assert model.reinforcement is shared
+    assert packaged.ReinforcementLearning.shared() is shared
+    assert shared.learning_file == os.path.abspath("learning_data.json")
+    model.learn_from_interaction("What is AI?", "AI stands for Artificial Intelligence.", 1)
+    assert shared.get_action_score("What is AI?") > 0
+
+
+SCRAPED = ("Quantum computers use qubits, which can represent a 0 and a 1 at the same time, "
+           "to solve certain problems such as factoring and simulation faster than classical machines.")
+
+def test_simhash_distances():
+    assert hamming_distance(simhash(SCRAPED), simhash(SCRAPED)) == 0
+    assert hamming_distance(simhash(SCRAPED), simhash(SCRAPED.replace("faster", "much faster"))) <= 10
+    assert hamming_distance(simhash(SCRAPED), simhash("Gravity is a force that pulls objects toward Earth.")) > 10
+
+def test_fingerprint_index_groups_and_removal():
+    index = FingerprintIndex()
+    index.add("a", simhash(SCRAPED), group="WebScraped")
+    index.add("b", simhash(SCRAPED), group="Other")
+    assert [item for item, _ in index.near(simhash(SCRAPED), group="WebScraped")] == ["a"]
+    index.remove("a")
+    assert index.near(simhash(SCRAPED), group="WebScraped") == []
+    assert len(index) == 1
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_distinct_short_facts_are_all_stored(tmp_path, storage):
+    knowledge = KnowledgeBase(str(tmp_path / f"knowledge.{storage}"), storage=storage)
+    knowledge.search_web = lambda query: pytest.fail("went to the web")
+    assert knowledge.add_fact("Work", "board meeting", "The meeting is at 3pm on Monday.")
+    assert knowledge.add_fact("Work", "board review", "The meeting is at 4pm on Tuesday.")
+    assert knowledge.add_fact("Work", "board review", "The meeting is at 4pm on Tuesday.", on_duplicate="skip")  # Too short to compare
+    assert knowledge.get_fact("Work", "board review")[0] == "The meeting is at 4pm on Tuesday."
+    assert set(knowledge.search_knowledge("board")["Work"]) == {"board meeting", "board review"}
+    knowledge.store.close()
+
+@pytest.mark.parametrize("storage", ["json", "sqlite"])
+def test_replace_swaps_the_fact_and_its_key(tmp_path, storage):
+    knowledge = KnowledgeBase(str(tmp_path / f"knowledge.{storage}"), storage=storage)
+    knowledge.add_fact(WEB_CATEGORY, "quantum computers", SCRAPED, on_duplicate="replace")
+    updated = SCRAPED.replace("faster", "much faster")
+    assert knowledge.add_fact(WEB_CATEGORY, "what are qubits", updated, on_duplicate="replace")
+    assert knowledge.store.category_facts(WEB_CATEGORY) == {"what are qubits": [updated]}
+    assert "quantum computers" not in knowledge.key_index.owners
+    assert knowledge.key_index.best_match("what are qubit")[:2] == ("what are qubits", WEB_CATEGORY)
+    assert not knowledge.add_fact(WEB_CATEGORY, "qubits", SCRAPED, on_duplicate="skip")
+    knowledge.store.close()
+
+def test_dedupe_only_sweeps_scraped_content_by_default(tmp_path):
+    knowledge = KnowledgeBase(str(tmp_path / "knowledge.json"))
+    for key in ("first", "second"):
+        knowledge.add_fact(WEB_CATEGORY, key, SCRAPED)
+        knowledge.add_fact("Notes", key, SCRAPED)
+    assert knowledge.dedupe() == 1
+    assert knowledge.store.category_facts(WEB_CATEGORY) == {"first": [SCRAPED]}
+    assert len(knowledge.store.category_facts("Notes")) == 2
+    assert knowledge.dedupe(category=None) == 1
+
+
+def test_missing_nltk_resource_is_not_retried(monkeypatch):
+    import nltk
+    downloads = []
+
+    def not_found(path):
+        raise LookupError(path)
+
+    monkeypatch.setattr(nltk.data, "find", not_found)
+    monkeypatch.setattr(nltk, "download", lambda name, quiet=False: downloads.append(name) or False)
+    monkeypatch.setitem(nltk_resources.RESOURCE_PATHS, "offline_corpus", "corpora/offline_corpus")
+    monkeypatch.setattr(nltk_resources, "AUTO_DOWNLOAD", True)
+    monkeypatch.setattr(nltk_resources, "_missing", {})
+    for _ in range(3):
+        with pytest.raises(LookupError, match="offline_corpus"):
+            nltk_resources.ensure_resource("offline_corpus")
+    assert downloads == ["offline_corpus"]
+
+
+def test_knowledge_index_matches_word_prefixes_only():
+    index = KnowledgeIndex({"Programming": {"Python": ["Python is a programming language."]}})
+    assert index.lookup("pyth") == (set(), {("Programming", "Python")})
+    assert index.lookup("prog") == ({"Programming"}, {("Programming", "Python")})
+    assert index.lookup("program lang") == (set(), {("Programming", "Python")})  # "lang" is only in the value
+    assert index.lookup("thon") == (set(), set())  # Substrings inside a word are not indexed
+    assert index.lookup("python ruby") == (set(), set())  # Every token has to match
+
+def test_knowledge_index_forgets_removed_values():
+    index = KnowledgeIndex()
+    index.add_fact("AI", "Machine Learning", "Systems learn from data.", "Models need data.")
+    index.remove_fact("AI", "Machine Learning", "Systems learn from data.", remaining=["Models need data."])
+    assert index.lookup("systems") == (set(), set())
+    assert index.lookup("data") == (set(), {("AI", "Machine Learning")})
+    index.remove_fact("AI", "Machine Learning", "Models need data.")
+    index.remove_category("AI")
+    assert index.lookup("machine") == (set(), set())
+    assert index.vocabulary == []
+
+def test_json_search_checks_only_word_prefix_matches(tmp_path):
+    store = JSONKnowledgeStore(str(tmp_path / "knowledge.json"))
+    store.add("Programming", "Python", "Python is a programming language.")
+    store.add("Science", "Gravity", "Gravity pulls objects toward Earth.")
+    assert store.search("Python is") == {"Programming": {"Python": ["Python is a programming language."]}}
+    assert store.search("science") == {"Science": {"Gravity": ["Gravity pulls objects toward Earth."]}}
+    assert store.search("thon") == {}
+    assert store.search("earth python") == {}
+
+
+@pytest.mark.parametrize("storage, target", [("json", "imported.json"), ("sqlite", "knowledge.db")])
+def test_import_json_is_idempotent(tmp_path, storage, target):
+    source = KnowledgeBase(str(tmp_path / "knowledge.json"))
+    source.add_fact("Programming", "Python", "Python is a programming language.")
+    source.add_fact("Science", "Gravity", "Gravity pulls objects toward Earth.")
+
+    knowledge = KnowledgeBase(str(tmp_path / target), storage=storage)
+    assert knowledge.import_json(str(tmp_path / "knowledge.json"))
+    assert not knowledge.import_json(str(tmp_path / "knowledge.json"))
+    assert list(knowledge.store.facts()) == list(source.store.facts())
+    assert knowledge.search_knowledge("Sciense") == {"Science": {"Gravity": ["Gravity pulls objects toward Earth."]}}
+    knowledge.store.close()
+
+def test_each_backend_has_its_own_default_file():
+    assert KnowledgeBase().knowledge_file == "knowledge.json"
+    sqlite_knowledge = KnowledgeBase(storage="sqlite")
+    assert sqlite_knowledge.knowledge_file == "knowledge.db"
+    sqlite_knowledge.store.close()
+
+def test_sqlite_store_is_safe_to_share_between_threads(tmp_path):
+    store = SQLiteKnowledgeStore(str(tmp_path / "knowledge.db"))
+    errors = []
+
+    def worker(n):
+        try:
+            for i in range(50):
+                store.add(f"Category {n}", f"key {i}", f"value {n} {i}")
+                store.search(f"value {n}")
+                store.get(f"Category {n}", f"key {i}")
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(store.facts()) == 400
+    store.close()
+
+
+def test_concurrent_misses_share_one_fetch(tmp_path):
+    cache = QueryCache(str(tmp_path / "query_cache.json"))
+    calls = []
+
+    def slow_lookup(query):
+        calls.append(query)
+        time.sleep(0.3)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("Quantum Computing", slow_lookup)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["Quantum Computing"]
+    assert results == ["answer"] * 5
+    assert cache.stats()["collapsed"] == 4
+    assert cache.get_or_fetch("quantum   computing", slow_lookup) == "answer" and len(calls) == 1
+
+def test_cache_writes_behind_and_prunes_expired_entries(tmp_path):
+    path = tmp_path / "query_cache.json"
+    cache = QueryCache(str(path), negative_ttl=0.05, flush_every=100, flush_interval=60)
+    cache.put("missing topic", None, negative=True)
+    cache.put("python", "answer")
+    assert not path.exists()  # Nothing written inline
+    time.sleep(0.1)
+    cache.flush()
+    assert set(json.loads(path.read_text())) == {"python"}
+    assert [name for name in os.listdir(tmp_path) if name.startswith(".tmp-")] == []
+    assert QueryCache(str(path)).get("Python") == (True, "answer")
+
+def test_only_empty_searches_are_cached_as_misses(tmp_path):
+    knowledge = KnowledgeBase(str(tmp_path / "knowledge.json"))
+    knowledge.web_cache = QueryCache(str(tmp_path / "query_cache.json"))
+    replies = {"offline topic": SEARCH_FAILED, "obscure topic": NO_RESULTS, "known topic": f"{RESULT_PREFIX}Some text..."}
+    calls = []
+    knowledge.search_web = lambda query: calls.append(query) or replies[query]
+    for _ in range(2):
+        for query in replies:
+            assert knowledge.search_knowledge(query) == replies[query]
+    assert calls == ["offline topic", "obscure topic", "known topic", "offline topic"]
+    assert knowledge.web_cache.entries["obscure topic"]["negative"]
+    assert not knowledge.web_cache.entries["known topic"]["negative"]
+
+
+def test_history_is_written_behind(tmp_path):
+    path = tmp_path / "memory.json"
+    memory = MemoryModule(str(path), flush_every=5, flush_interval=60)
+    for turn in range(4):
+        memory.add_to_history(f"turn {turn}", "ok")
+    assert not path.exists()  # Below the threshold nothing is written
+    memory.add_to_history("turn 4", "ok")
+    deadline = time.monotonic() + 5
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert [entry["user"] for entry in json.loads(path.read_text())["conversation_history"]][-1] == "turn 4"
+    stats = memory.writer.stats()
+    assert stats["flushes"] == 1 and stats["pending"] == 0 and stats["last_flush_ms"] > 0
+
+def test_flush_writes_pending_changes(tmp_path):
+    path = tmp_path / "memory.json"
+    memory = MemoryModule(str(path), flush_every=100, flush_interval=60)
+    memory.remember("Personal", "favorite_color", "Blue")
+    memory.flush()
+    assert MemoryModule(str(path)).recall("Personal", "favorite_color") == ["Blue"]
+
+def test_failed_atomic_write_keeps_the_old_file(tmp_path):
+    path = tmp_path / "memory.json"
+    atomic_write_json(str(path), {"conversation_history": []})
+    with pytest.raises(TypeError):
+        atomic_write_json(str(path), {"conversation_history": [object()]})  # Fails halfway through dumping
+    assert json.loads(path.read_text()) == {"conversation_history": []}
+    assert os.listdir(tmp_path) == ["memory.json"]
+
+
+@pytest.mark.parametrize("decay_mode", ["step", "time"])
+def test_feedback_batch_matches_one_at_a_time(tmp_path, monkeypatch, decay_mode):
+    monkeypatch.setattr(time, "time", lambda: 1_700_000_000.0)  # Both runs see the same clock
+    rng = random.Random(3)
+    events = [(f"action {rng.randint(0, 20)}", rng.randint(-3, 3), f"detail {i}") for i in range(500)]
+    single = ReinforcementLearning(str(tmp_path / "single.json"), decay_mode=decay_mode, history_depth=5)
+    batch = ReinforcementLearning(str(tmp_path / "batch.json"), decay_mode=decay_mode, history_depth=5)
+    for event in events:
+        single.provide_feedback(*event)
+    batch.provide_feedback_batch(events[:123])
+    batch.provide_feedback_batch(events[123:])
+
+    actions = sorted({event[0] for event in events})
+    for action in actions:
+        assert batch.get_action_score(action) == pytest.approx(single.get_action_score(action), abs=1e-9)
+        assert batch.get_action_history(action) == single.get_action_history(action)
+    assert [action for action, _ in batch.top_actions(5)] == [action for action, _ in single.top_actions(5)]
+
+def test_feedback_batch_persists_once(tmp_path):
+    path = tmp_path / "learning_data.json"
+    rl = ReinforcementLearning(str(path), flush_every=1000, flush_interval=60)
+    rl.provide_feedback_batch([("Play Music", 1), ("Stop Music", -1), ("Play Music", 2)])
+    deadline = time.monotonic() + 5
+    while rl.writer.stats()["flushes"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert rl.writer.stats()["flushes"] == 1
+    reloaded = ReinforcementLearning(str(path))  # The recent window is not persisted, so compare unweighted scores
+    assert reloaded.get_action_score("Play Music", weighted=False) == pytest.approx(rl.get_action_score("Play Music", weighted=False))
+
+
+def test_idle_session_is_spilled_and_reopened(tmp_path):
+    manager = SessionManager(str(tmp_path / "sessions"), max_active=2)
+    alice = manager.get("alice")
+    alice.add_to_history("Hi, I'm alice", "Hello alice!")
+    manager.get("bob")
+    manager.get("carol")  # Spills alice
+    assert os.path.exists(manager.session_file("alice"))
+    assert "alice" not in manager.active
+    alice.add_to_history("Still there?", "Yes!")  # A stale reference forwards to the reloaded session
+    assert [turn["user"] for turn in manager.get("alice").get_history()] == ["Hi, I'm alice", "Still there?"]
+    assert manager.stats()["spills"] >= 2
+
+def test_closed_memory_without_reopen_rejects_writes(tmp_path):
+    memory = MemoryModule(str(tmp_path / "memory.json"))
+    memory.close()
+    with pytest.raises(RuntimeError):
+        memory.add_to_history("Hello?", "...")
+
+def test_concurrent_sessions_lose_no_turns(tmp_path):
+    manager = SessionManager(str(tmp_path / "sessions"), max_active=2, history_limit=2000)
+    sessions = [f"user{n}" for n in range(6)]
+
+    def worker(thread):
+        for i in range(150):
+            manager.get(sessions[(thread + i) % len(sessions)]).add_to_history(f"{thread}-{i}", "ok")
+
+    threads = [threading.Thread(target=worker, args=(thread,)) for thread in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    manager.flush()
+
+    turns = []
+    for session in sessions:
+        with open(manager.session_file(session)) as f:
+            turns += [turn["user"] for turn in json.load(f)["conversation_history"]]
+    assert sorted(turns) == sorted(f"{thread}-{i}" for thread in range(8) for i in range(150))
+    assert len(manager.active) <= 2
+
+
+def test_sentiment_windows_match_a_rescan(tmp_path):
+    rng = random.Random(4)
+    history = SentimentHistory(str(tmp_path / "sentiment_history.json"), capacity=7, ewma_alpha=0.3)
+    scores, ewma = [], None
+    for _ in range(40):  # Wraps the ring several times
+        score = rng.choice([-0.8, -0.05, 0.0, 0.03, 0.05, 0.6])
+        history.add(score)
+        scores.append(score)
+        ewma = score if ewma is None else 0.3 * score + 0.7 * ewma
+        for n in range(10):
+            tail = scores[-min(n, 7):] if n else []
+            assert history.window(n) == pytest.approx({
+                "count": len(tail),
+                "mean": sum(tail) / len(tail) if tail else 0.0,
+                "positive": sum(score >= 0.05 for score in tail),
+                "negative": sum(score <= -0.05 for score in tail)
+            })
+        assert history.last(7) == scores[-7:]
+        assert history.ewma == pytest.approx(ewma)
+
+def test_sentiment_history_persists_apart_from_memory(tmp_path):
+    path = tmp_path / "sentiment_history.json"
+    analyzer = SentimentAnalyzer(str(path), capacity=3)
+    for score in [0.9, -0.7, -0.6, 0.1]:
+        analyzer.history.add(score)
+    assert analyzer.get_sentiment_trend(3) == "User's sentiment is trending negative."
+    analyzer.history.flush()
+    reloaded = SentimentHistory(str(path), capacity=3)
+    assert reloaded.last(3) == [-0.7, -0.6, 0.1]
+    assert reloaded.ewma == pytest.approx(analyzer.history.ewma)
+    assert not os.path.exists("memory.json")
+
+
+def test_not_modified_is_served_from_cache(server, tmp_path):
+    cache = HTTPCache(str(tmp_path / "http_cache"))
+    engine = FetchEngine(cache=cache)
+    first = engine.get(f"{server.base}/cached")
+    second = engine.get(f"{server.base}/cached")  # max-age=0, so revalidated
+    assert not getattr(first, "from_cache", False)
+    assert second.from_cache and second.status_code == 200
+    assert second.content == PAGE
+    assert server.revalidations == 1
+    assert cache.stats()["revalidated"] == 1
+    engine.close()
+
+def test_replaced_cache_entries_release_their_bodies(tmp_path):
+    class Response:
+        status_code = 200
+        headers = {}
+        encoding = "utf-8"
+
+        def __init__(self, content):
+            self.content = content
+            self.url = "http://example.com/page"
+
+    cache = HTTPCache(str(tmp_path / "http_cache"), max_bytes=3000)
+    for _ in range(10):
+        cache.store("http://example.com/page", Response(os.urandom(1000)))
+    bodies = [name for _, _, names in os.walk(cache.body_dir) for name in names]
+    assert cache.stats()["entries"] == 1
+    assert len(bodies) == 1
+    assert cache.stored_bytes() == os.path.getsize(os.path.join(cache.body_dir, bodies[0][:2], bodies[0]))
+
+
+def test_service_unavailable_is_retried(server):
+    engine = FetchEngine(crawl_options={"backoff": 0.01})
+    response = engine.get(f"{server.base}/flaky")
+    assert response.status_code == 200
+    assert engine.scheduler.stats()["retried"] == 2
+    engine.close()
+
+def test_interactive_requests_jump_the_background_queue():
+    gate, order = threading.Event(), []
+
+    def fetch(url):
+        if url.endswith("/first"):
+            gate.wait()
+        order.append(url.rsplit("/", 1)[1])
+        return type("Response", (), {"status_code": 200})()
+
+    scheduler = CrawlScheduler(fetch, max_workers=1, per_host_concurrency=1, rate=1000, burst=1000)
+    first = scheduler.submit("http://example.com/first")
+    time.sleep(0.1)  # The only worker is now busy
+    later = [scheduler.submit("http://example.com/background", BACKGROUND),
+             scheduler.submit("http://example.com/interactive", INTERACTIVE)]
+    gate.set()
+    for future in [first] + later:
+        future.result(timeout=5)
+    assert order == ["first", "interactive", "background"]
+    scheduler.close()